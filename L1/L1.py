@@ -1,14 +1,16 @@
-import random
 import collections
 import os
+import sys
 import zipfile
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.plotting import pyplot
+from common.synth import random_dna
 
 
 def generate_dna(length=200):
-	return ''.join(random.choices('ATGC', k=length))
+	return random_dna(length)
 
 
 def nucleotide_percentages(seq):
@@ -19,7 +21,11 @@ def nucleotide_percentages(seq):
 
 def dinucleotide_percentage(seq, dinuc='CG'):
 	total = max(len(seq) - 1, 1)
-	count = sum(1 for i in range(len(seq) - 1) if seq[i:i+2] == dinuc)
+	if len(dinuc) == 2 and seq.isascii() and dinuc.isascii():
+		codes = np.frombuffer(seq.encode('ascii'), dtype=np.uint8)
+		count = int(np.count_nonzero((codes[:-1] == ord(dinuc[0])) & (codes[1:] == ord(dinuc[1]))))
+	else:
+		count = sum(1 for i in range(len(seq) - 1) if seq[i:i+2] == dinuc)
 	return (count / total) * 100, count, total
 
 
@@ -34,6 +40,7 @@ def save_results(seq, nuc_perc, cg_perc, cg_count, cg_total, out_txt='results.tx
 
 
 def plot_cg_percentage(cg_perc, out_img='Screenshot.jpg'):
+	plt = pyplot()
 	fig, ax = plt.subplots(figsize=(4, 6))
 	ax.bar(['CG'], [cg_perc], color='#2ca02c')
 	ax.set_ylim(0, 100)
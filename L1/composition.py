@@ -0,0 +1,128 @@
+import argparse
+import itertools
+import os
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.fasta import read_records
+from common.kmers import INVALID, base_codes
+
+MONO = ['A', 'C', 'G', 'T']
+DI = [''.join(p) for p in itertools.product(MONO, repeat=2)]
+TRI = [''.join(p) for p in itertools.product(MONO, repeat=3)]
+
+
+def _counts(codes, windows=None, n_windows=1):
+	# mono-, di- and trinucleotide counts (2-bit code order), one row per window, all
+	# built from the one code array; a k-mer only counts in a window that holds all of it
+	valid = codes != INVALID
+	bases = np.minimum(codes, 3).astype(np.int64)
+	if windows is None:
+		windows = np.zeros(len(codes), dtype=np.int64)
+	index, keep = bases, valid
+	counts = []
+	for k in (1, 2, 3):
+		if k > 1:
+			index = index[:-1] * 4 + bases[k - 1:]
+			keep = keep[:-1] & valid[k - 1:] & (windows[:len(index)] == windows[k - 1:])
+		keys = index[keep] + windows[:len(index)][keep] * 4 ** k
+		counts.append(np.bincount(keys, minlength=n_windows * 4 ** k).reshape(n_windows, 4 ** k))
+	return counts
+
+
+def _summarise(length, mono, di, tri):
+	# turns count rows into the percentage / ratio table used everywhere below
+	length = np.asarray(length, dtype=np.float64)
+	a, c, g, t = mono.T
+	with np.errstate(divide='ignore', invalid='ignore'):
+		cpg_oe = np.where(c * g > 0, di[:, DI.index('CG')] * length / (c * g), 0.0)
+		gc_skew = np.where(g + c > 0, (g - c) / (g + c), 0.0)
+	mono_pct = mono * 100 / np.maximum(length, 1)[:, None]
+	di_pct = di * 100 / np.maximum(length - 1, 1)[:, None]
+	tri_pct = tri * 100 / np.maximum(length - 2, 1)[:, None]
+	rows = []
+	for i in range(len(length)):
+		rows.append({
+			'length': int(length[i]),
+			'mono': dict(zip(MONO, mono_pct[i].tolist())),
+			'di': dict(zip(DI, di_pct[i].tolist())),
+			'tri': dict(zip(TRI, tri_pct[i].tolist())),
+			'gc': float((mono_pct[i, 1] + mono_pct[i, 2])),
+			'cpg_oe': float(cpg_oe[i]),
+			'gc_skew': float(gc_skew[i]),
+		})
+	return rows
+
+
+def composition_profile(seq):
+	"""Mono-, di- and trinucleotide percentages, CpG observed/expected and GC skew of a sequence"""
+	codes = base_codes(seq.upper())
+	return _summarise([len(codes)], *_counts(codes))[0]
+
+
+def window_profiles(seq, window):
+	"""composition_profile for consecutive non-overlapping windows (the last one may be shorter)
+
+	A dinucleotide or trinucleotide is only counted in a window that holds all of
+	it, so percentages are over the length-1 and length-2 starts of each window.
+	"""
+	codes = base_codes(seq.upper())
+	n_windows = max(1, -(-len(codes) // window))
+	windows = np.arange(len(codes)) // window
+	lengths = np.minimum(window, len(codes) - np.arange(n_windows) * window)
+	rows = _summarise(lengths, *_counts(codes, windows, n_windows))
+	for i, row in enumerate(rows):
+		row['start'] = i * window
+	return rows
+
+
+def _profile_record(args):
+	header, seq, window = args
+	return header, composition_profile(seq), window_profiles(seq, window) if window else []
+
+
+def profile_fasta(path, window=None, processes=None):
+	"""Yield (header, profile, window_profiles) for every record of a FASTA file, in file order
+
+	Records are profiled in parallel on a process pool.
+	"""
+	tasks = ((header, seq, window) for header, seq in read_records(path))
+	if processes == 1:
+		yield from map(_profile_record, tasks)
+		return
+	with Pool(processes) as pool:
+		yield from pool.imap(_profile_record, tasks)
+
+
+def _row(name, level, start, profile, columns):
+	values = [profile['length'], profile['gc'], profile['cpg_oe'], profile['gc_skew']]
+	values += [profile['mono'][nt] for nt in MONO]
+	values += [profile['di'][d] for d in DI]
+	if columns == 'tri':
+		values += [profile['tri'][t] for t in TRI]
+	return '\t'.join([name, level, str(start)] + [f"{v:.4f}" if isinstance(v, float) else str(v) for v in values])
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Nucleotide composition of every record in FASTA files')
+	parser.add_argument('fasta', nargs='+')
+	parser.add_argument('--window', type=int, default=None, help='also report fixed-size windows of this many bases')
+	parser.add_argument('--processes', type=int, default=None, help='worker processes (default: one per CPU)')
+	parser.add_argument('--trinucleotides', action='store_true', help='add the 64 trinucleotide columns')
+	args = parser.parse_args()
+	columns = 'tri' if args.trinucleotides else 'di'
+	header = ['record', 'level', 'start', 'length', 'gc', 'cpg_oe', 'gc_skew'] + MONO + DI + (TRI if args.trinucleotides else [])
+	print('\t'.join(header))
+	for path in args.fasta:
+		for name, profile, windows in profile_fasta(path, args.window, args.processes):
+			name = name.split()[0] if name else ''
+			print(_row(name, 'record', 0, profile, columns))
+			for w in windows:
+				print(_row(name, 'window', w['start'], w, columns))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,241 @@
+"""Scaling benchmarks for the hot paths of the labs.
+
+Every benchmark builds seeded synthetic input (common.synth) at a series of
+sizes, so runs are reproducible and need no network. Each size is timed as
+the best of --repeat runs and then run once more under tracemalloc for the
+peak traced memory. The scaling exponent is the slope of log(time) against
+log(size); 1.0 is linear.
+
+    python benchmarks/run_benchmarks.py -o bench.json
+    python benchmarks/run_benchmarks.py --quick --compare bench.json
+
+With --compare, every benchmark is checked against a previous JSON result
+and a slowdown beyond --threshold is reported as a regression (exit status 1
+with --fail-on-regression).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.fasta import read_records
+from common.labs import add_lab_paths, load_lab5
+from common.synth import SyntheticGenome, random_dna, write_fasta
+
+add_lab_paths()
+
+
+def bench_sliding_window_tm(size, seed):
+    from lab3ex2 import sliding_window_tm
+    seq = random_dna(size, seed=seed)
+    return lambda: sliding_window_tm(seq, 8)
+
+
+def bench_find_repetitive_sequences(size, seed):
+    from lab7 import find_repetitive_sequences
+    seq = random_dna(size, seed=seed)
+    return lambda: find_repetitive_sequences(seq, 3, 6, 2)
+
+
+def bench_find_most_frequent_repeat(size, seed):
+    from lab7ex2 import find_most_frequent_repeat
+    seq = random_dna(size, seed=seed)
+    return lambda: find_most_frequent_repeat(seq)
+
+
+def _reads(size, seed, lab5):
+    seq = random_dna(size, seed=seed)
+    random.seed(seed)
+    # about 10x coverage at the default read lengths
+    return lab5.take_reads(seq, size * 10 // 125, lab5.MIN_READ_LEN, lab5.MAX_READ_LEN)
+
+
+def bench_build_prefix_suffix_maps(size, seed):
+    lab5 = load_lab5()
+    reads = _reads(size, seed, lab5)
+    return lambda: lab5.build_prefix_suffix_maps(reads, lab5.MIN_OVERLAP, lab5.MAX_OVERLAP)
+
+
+def bench_assemble_reads_greedy(size, seed):
+    lab5 = load_lab5()
+    reads = _reads(size, seed, lab5)
+
+    def run():
+        random.seed(seed)
+        return lab5.assemble_reads_greedy(reads, lab5.MIN_OVERLAP, lab5.MAX_OVERLAP)
+    return run
+
+
+def bench_dinucleotide_percentage(size, seed):
+    from L1 import dinucleotide_percentage
+    seq = random_dna(size, seed=seed)
+    return lambda: dinucleotide_percentage(seq, 'CG')
+
+
+def bench_ascii_gel(size, seed):
+    from lab6 import ascii_gel
+    rng = np.random.default_rng(seed)
+    lanes = [rng.integers(50, 3000, 12).tolist() for _ in range(size)]
+    return lambda: ascii_gel(lanes, seed=seed)
+
+
+def bench_fasta_parsing(size, seed):
+    handle, path = tempfile.mkstemp(suffix='.fa')
+    os.close(handle)
+    records = 4
+    write_fasta(path, [(f'chr{i}', SyntheticGenome(size // records, seed=seed + i)) for i in range(records)])
+    _cleanup.append(path)
+    return lambda: sum(len(seq) for _, seq in read_records(path))
+
+
+_cleanup = []
+
+# name -> (setup, unit, full sizes, quick sizes)
+BENCHMARKS = {
+    'sliding_window_tm': (bench_sliding_window_tm, 'bases',
+                          [10_000, 100_000, 1_000_000], [10_000, 30_000, 100_000]),
+    'find_repetitive_sequences': (bench_find_repetitive_sequences, 'bases',
+                                  [10_000, 100_000, 1_000_000], [3_000, 10_000, 30_000]),
+    'find_most_frequent_repeat': (bench_find_most_frequent_repeat, 'bases',
+                                  [10_000, 100_000, 1_000_000], [10_000, 30_000, 100_000]),
+    'build_prefix_suffix_maps': (bench_build_prefix_suffix_maps, 'genome bases',
+                                 [2_000, 8_000, 32_000], [1_000, 2_000, 4_000]),
+    'assemble_reads_greedy': (bench_assemble_reads_greedy, 'genome bases',
+                              [1_000, 2_000, 4_000, 8_000], [1_000, 2_000, 4_000]),
+    'dinucleotide_percentage': (bench_dinucleotide_percentage, 'bases',
+                                [100_000, 1_000_000, 10_000_000], [100_000, 300_000, 1_000_000]),
+    'ascii_gel': (bench_ascii_gel, 'lanes', [10, 100, 1000], [10, 30, 100]),
+    'fasta_parsing': (bench_fasta_parsing, 'bases',
+                      [1_000_000, 10_000_000, 50_000_000], [100_000, 1_000_000, 3_000_000]),
+}
+
+
+def measure(fn, repeat):
+    """(best wall time of repeat runs, peak traced bytes of one extra run)
+
+    The traced run goes first and doubles as a warm-up for the timed ones.
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, peak
+
+
+def scaling_exponent(sizes, seconds):
+    """Slope of log(seconds) over log(size), or None with fewer than two usable points"""
+    points = [(s, t) for s, t in zip(sizes, seconds) if t > 0]
+    if len(points) < 2:
+        return None
+    x, y = np.log([p[0] for p in points]), np.log([p[1] for p in points])
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def run_benchmark(name, quick=False, repeat=3, seed=1):
+    setup, unit, sizes, quick_sizes = BENCHMARKS[name]
+    results = []
+    for size in (quick_sizes if quick else sizes):
+        fn = setup(size, seed + size)
+        seconds, peak = measure(fn, repeat)
+        results.append({'size': size, 'seconds': seconds, 'peak_bytes': peak})
+        print(f"  {name:<28} {size:>12,} {unit:<12} {seconds:10.4f}s {peak / 2**20:9.1f} MiB", file=sys.stderr)
+    exponent = scaling_exponent([r['size'] for r in results], [r['seconds'] for r in results])
+    return {'unit': unit, 'results': results, 'exponent': exponent}
+
+
+def compare(current, previous, threshold):
+    """Per-benchmark geometric mean time ratio against a previous run; returns the regressions"""
+    regressions = []
+    print(f"\n{'benchmark':<28} {'ratio':>8} {'exp now':>8} {'exp was':>8}")
+    for name, bench in current['benchmarks'].items():
+        old = previous.get('benchmarks', {}).get(name)
+        if old is None:
+            print(f"{name:<28} {'new':>8}")
+            continue
+        old_times = {r['size']: r['seconds'] for r in old['results']}
+        ratios = [r['seconds'] / old_times[r['size']] for r in bench['results']
+                  if old_times.get(r['size'], 0) > 0 and r['seconds'] > 0]
+        if not ratios:
+            print(f"{name:<28} {'n/a':>8}")
+            continue
+        ratio = float(np.exp(np.mean(np.log(ratios))))
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        fmt = lambda e: f"{e:8.2f}" if e is not None else f"{'-':>8}"
+        print(f"{name:<28} {ratio:8.2f} {fmt(bench['exponent'])} {fmt(old.get('exponent'))}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the scaling benchmarks on seeded synthetic data.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", metavar="JSON", help="compare against a previous results file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown ratio above 1 counted as a regression (default: 0.25)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on regressions")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per size, best is kept (default: 3)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': args.seed,
+            'quick': args.quick,
+            'repeat': args.repeat,
+        },
+        'benchmarks': {},
+    }
+    try:
+        for name in args.names or BENCHMARKS:
+            report['benchmarks'][name] = run_benchmark(name, args.quick, args.repeat, args.seed)
+    finally:
+        for path in _cleanup:
+            os.remove(path)
+
+    print(f"\n{'benchmark':<28} {'exponent':>9}")
+    for name, bench in report['benchmarks'].items():
+        exponent = bench['exponent']
+        print(f"{name:<28} {exponent:9.2f}" if exponent is not None else f"{name:<28} {'-':>9}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        regressions = compare(report, previous, args.threshold)
+        if regressions:
+            print(f"\nRegressions: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
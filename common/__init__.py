@@ -0,0 +1 @@
+"""Code shared by the lab scripts (FASTA I/O, NCBI access, sequence helpers)."""
@@ -0,0 +1,113 @@
+"""Persistent on-disk cache for downloaded sequences and search results.
+
+Entries are gzip-compressed and stored under the SHA-256 of their key, so any
+string (an accession, a search query) can be a key. Recency is tracked through
+file modification times, which makes the least recently used entries the
+first to go once the cache grows past max_bytes.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'bioinformatics-labs')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class SequenceCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or os.environ.get('BIOLAB_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = None
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + '.gz')
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.gz'):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield st.st_mtime, st.st_size, path
+
+    def size(self):
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def get(self, key):
+        """Cached text for key, or None; a hit marks the entry as recently used"""
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                text = f.read()
+        except (FileNotFoundError, OSError, EOFError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # sized before writing, or a first scan would count the new entry twice
+        size = self.size()
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+            f.write(text.encode('utf-8'))
+        os.replace(tmp, path)
+        self._size = size - old_size + os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def get_json(self, key):
+        text = self.get(key)
+        return None if text is None else json.loads(text)
+
+    def put_json(self, key, value):
+        self.put(key, json.dumps(value))
+
+    def evict(self, target=None):
+        """Drop least recently used entries until the cache fits in target bytes
+
+        The default target leaves 10% headroom below max_bytes so that a full
+        cache is not rescanned on every put.
+        """
+        if target is None:
+            target = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'bytes': self.size()}
+
+
+_default_cache = None
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SequenceCache()
+    return _default_cache
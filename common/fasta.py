@@ -0,0 +1,184 @@
+"""FASTA reading shared by all labs.
+
+read_records() streams (header, sequence) pairs without loading the whole file,
+and FastaIndex uses a samtools-style .fai index to pull regions out of a
+memory-mapped file.
+"""
+import mmap
+import os
+import re
+
+_NON_ACGTN = re.compile('[^ACGTN]')
+
+
+def _parse_lines(lines):
+    header = None
+    chunks = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('>'):
+            if header is not None or chunks:
+                yield (header or '', ''.join(chunks))
+            header = line[1:]
+            chunks = []
+        else:
+            chunks.append(line)
+    if header is not None or chunks:
+        yield (header or '', ''.join(chunks))
+
+
+def read_records(source):
+    """Yield (header, sequence) for each record of a FASTA file path or an iterable of lines"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source) as f:
+            yield from _parse_lines(f)
+    else:
+        yield from _parse_lines(source)
+
+
+def parse_records(fasta_text):
+    """Yield (header, sequence) for each record in a FASTA string"""
+    return _parse_lines(fasta_text.splitlines())
+
+
+def clean_sequence(seq):
+    return _NON_ACGTN.sub('', seq.upper())
+
+
+def parse_fasta(fasta_text):
+    """First record of a FASTA string as (header, sequence), keeping only ACGTN"""
+    if not fasta_text.lstrip().startswith('>'):
+        return ('UNKNOWN', '')
+    for header, seq in parse_records(fasta_text):
+        return (header, clean_sequence(seq))
+
+
+def build_fai(path, fai_path=None):
+    """Scan a FASTA file once and write its .fai index; returns the index entries
+
+    Each entry is (name, length, offset, line_bases, line_width) as in samtools faidx.
+    Like samtools, a record whose lines are not all the same length (but the
+    last), or with a blank line before its last sequence line, is rejected:
+    offsets computed from it would be wrong.
+    """
+    entries = []
+    current = None
+    offset = 0
+    last_line = False
+    blank_at = None
+    with open(path, 'rb') as f:
+        for raw in f:
+            line_start = offset
+            offset += len(raw)
+            if raw.startswith(b'>'):
+                if current is not None:
+                    entries.append(tuple(current))
+                name = raw[1:].split(None, 1)[0].decode() if raw[1:].strip() else ''
+                current = [name, 0, offset, 0, 0]
+                last_line = False
+                blank_at = None
+                continue
+            bases = len(raw.rstrip(b'\r\n'))
+            if current is None:
+                continue
+            if bases == 0:
+                # fine at the end of a record, an error if more sequence follows
+                if blank_at is None:
+                    blank_at = line_start
+                continue
+            if blank_at is not None:
+                raise ValueError(f"{path}: record {current[0]!r} has a blank line at byte {blank_at}")
+            if last_line:
+                raise ValueError(f"{path}: record {current[0]!r} has uneven line lengths at byte {line_start}")
+            if current[3] == 0:
+                current[3] = bases
+                current[4] = len(raw)
+            elif bases != current[3] or len(raw) != current[4]:
+                last_line = True
+            current[1] += bases
+    if current is not None:
+        entries.append(tuple(current))
+    with open(fai_path or str(path) + '.fai', 'w') as out:
+        for entry in entries:
+            out.write('\t'.join(str(v) for v in entry) + '\n')
+    return entries
+
+
+def load_fai(fai_path):
+    entries = []
+    with open(fai_path) as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 5:
+                continue
+            entries.append((fields[0],) + tuple(int(v) for v in fields[1:5]))
+    return entries
+
+
+class FastaIndex:
+    """Random access to records of an indexed FASTA file
+
+    The .fai next to the file is built on first use. Coordinates given to
+    fetch() are 0-based and half-open, like Python slicing.
+    """
+
+    def __init__(self, path, fai_path=None, rebuild=False):
+        self.path = str(path)
+        fai_path = fai_path or self.path + '.fai'
+        if rebuild or not os.path.exists(fai_path) or os.path.getmtime(fai_path) < os.path.getmtime(self.path):
+            entries = build_fai(self.path, fai_path)
+        else:
+            entries = load_fai(fai_path)
+        self.entries = {e[0]: e for e in entries}
+        self._file = open(self.path, 'rb')
+        if os.path.getsize(self.path):
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def names(self):
+        return list(self.entries)
+
+    def length(self, name):
+        return self.entries[name][1]
+
+    def _byte_offset(self, entry, pos):
+        _, _, offset, line_bases, line_width = entry
+        if line_bases == 0:
+            return offset
+        return offset + (pos // line_bases) * line_width + pos % line_bases
+
+    def fetch(self, name, start=0, end=None):
+        entry = self.entries[name]
+        length = entry[1]
+        end = length if end is None else min(end, length)
+        start = max(0, start)
+        if start >= end:
+            return ''
+        lo = self._byte_offset(entry, start)
+        hi = self._byte_offset(entry, end)
+        return self._map[lo:hi].replace(b'\n', b'').replace(b'\r', b'').decode('ascii')
+
+    def records(self):
+        for name in self.entries:
+            yield name, self.fetch(name)
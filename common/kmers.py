@@ -0,0 +1,102 @@
+"""2-bit integer k-mer encoding (A=0, C=1, G=2, T=3) on NumPy arrays."""
+import numpy as np
+
+MAX_K = 32
+INVALID = 4
+# count with a dense 4**k table only while it stays small next to the input
+DENSE_MAX_K = 12
+DENSE_RATIO = 8
+
+_CODES = np.full(256, INVALID, dtype=np.uint8)
+for _i, _b in enumerate(b'ACGT'):
+    _CODES[_b] = _i
+
+
+def base_codes(seq):
+    """uint8 array of base codes; anything other than upper-case ACGT becomes INVALID
+
+    A PackedSeq is decoded directly from its 2-bit buffer.
+    """
+    if hasattr(seq, 'codes'):
+        return seq.codes()
+    if isinstance(seq, str):
+        seq = seq.encode('ascii', errors='replace')
+    return _CODES[np.frombuffer(seq, dtype=np.uint8)]
+
+
+def encode_kmers(seq, k):
+    """Packed code of every k-mer window and a mask of the windows made only of ACGT
+
+    seq may be a string, a PackedSeq or an array from base_codes(). Window i covers seq[i:i+k].
+    """
+    if not 1 <= k <= MAX_K:
+        raise ValueError(f"k must be between 1 and {MAX_K}, got {k}")
+    codes = seq if isinstance(seq, np.ndarray) else base_codes(seq)
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+    bases = np.minimum(codes, 3).astype(np.uint64)
+    kmers = np.zeros(n, dtype=np.uint64)
+    two = np.uint64(2)
+    for j in range(k):
+        np.left_shift(kmers, two, out=kmers)
+        np.bitwise_or(kmers, bases[j:j+n], out=kmers)
+    bad = np.zeros(len(codes)+1, dtype=np.int64)
+    np.cumsum(codes == INVALID, out=bad[1:])
+    valid = (bad[k:] - bad[:n]) == 0
+    return kmers, valid
+
+
+def decode_kmer(code, k):
+    code = int(code)
+    chars = []
+    for _ in range(k):
+        chars.append('ACGT'[code & 3])
+        code >>= 2
+    return ''.join(reversed(chars))
+
+
+def group_kmers(kmers, valid, min_count=1):
+    """Group valid windows by k-mer code
+
+    Returns (codes, first_positions, positions_sorted, group_starts, group_counts) for
+    codes seen at least min_count times; positions of group g are
+    positions_sorted[group_starts[g]:group_starts[g]+group_counts[g]], ascending.
+    """
+    idx = np.flatnonzero(valid)
+    keys = kmers[idx]
+    order = np.argsort(keys, kind='stable')
+    positions = idx[order]
+    keys = keys[order]
+    if len(keys):
+        starts = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+    else:
+        starts = np.zeros(0, dtype=np.int64)
+    counts = np.diff(np.append(starts, len(keys)))
+    keep = counts >= min_count
+    starts = starts[keep]
+    counts = counts[keep]
+    return keys[starts], positions[starts], positions, starts, counts
+
+
+def count_kmers(kmers, k):
+    """Distinct k-mer codes (ascending) and their occurrence counts"""
+    if k <= DENSE_MAX_K and 4 ** k <= DENSE_RATIO * max(len(kmers), 1):
+        table = np.bincount(kmers.astype(np.int64), minlength=4 ** k)
+        keys = np.flatnonzero(table)
+        return keys.astype(np.uint64), table[keys]
+    return np.unique(kmers, return_counts=True)
+
+
+def top_kmers(keys, counts, n):
+    """The n most frequent codes by partial selection, most frequent first
+
+    Codes tied with the n-th count are all kept so callers can break ties themselves.
+    """
+    if n < len(counts):
+        cutoff = np.partition(counts, len(counts) - n)[len(counts) - n]
+        keep = counts >= cutoff
+        keys = keys[keep]
+        counts = counts[keep]
+    order = np.argsort(-counts, kind='stable')
+    return keys[order], counts[order]
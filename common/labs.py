@@ -0,0 +1,33 @@
+"""Importing the lab scripts from outside their own directories.
+
+The labs import their sibling modules by bare name (lab5ex1 does
+`from debruijn import ...`, lab7 does `from tandem import ...`), which only
+works with the lab directory on sys.path. Running a lab as a script does that
+by itself; everything else calls add_lab_paths() first.
+"""
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAB_DIRS = ('L1', 'lab3', 'lab5', 'lab6', 'lab7')
+
+
+def add_lab_paths():
+    """Put the repository root and every lab directory on sys.path"""
+    for path in [os.path.join(ROOT, d) for d in LAB_DIRS] + [ROOT]:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def load_lab5():
+    """The lab5ex1 script as a module (it has no .py extension, so it cannot be imported by name)"""
+    if 'lab5ex1' not in sys.modules:
+        add_lab_paths()
+        loader = importlib.machinery.SourceFileLoader('lab5ex1', os.path.join(ROOT, 'lab5', 'lab5ex1'))
+        spec = importlib.util.spec_from_loader('lab5ex1', loader)
+        module = importlib.util.module_from_spec(spec)
+        loader.exec_module(module)
+        sys.modules['lab5ex1'] = module
+    return sys.modules['lab5ex1']
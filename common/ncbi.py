@@ -0,0 +1,350 @@
+"""NCBI E-utilities access shared by the labs.
+
+EutilsClient keeps one persistent HTTP connection per worker thread, spaces
+requests out with a rate limiter that follows the E-utilities quota (3 req/s,
+10 req/s with an API key) and fetches many IDs per efetch call.
+
+Downloads go through a SequenceCache first. In offline mode (offline=True or
+BIOLAB_OFFLINE=1) only cached data is used, and a sequence that cannot be
+served fails loudly instead of being replaced behind the caller's back.
+"""
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib import parse
+
+from common.cache import default_cache
+from common.fasta import clean_sequence, parse_records
+from common.synth import random_dna
+
+EUTILS_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/'
+ESEARCH_PAGE = 10000
+# cached search results are repeated after this many seconds; new entries keep arriving in GenBank
+SEARCH_TTL = 7 * 24 * 3600
+
+
+def sequence_search_term(min_len, max_len):
+    return f'{min_len}:{max_len}[SLEN] AND biomol_genomic[PROP] NOT mitochondrial[Title] NOT chloroplast[Title]'
+
+
+class RateLimiter:
+    """Lets at most `rate` calls per second through wait(), shared across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class EutilsClient:
+    def __init__(self, api_key=None, base_url=EUTILS_URL, timeout=30, max_workers=3, rate=None,
+                 batch_size=200, retries=3, backoff=0.5):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.retries = retries
+        # seconds before the first retry, doubled for each further one
+        self.backoff = backoff
+        if rate is None:
+            rate = 10 if api_key else 3
+        self.limiter = RateLimiter(rate)
+        url = parse.urlsplit(base_url)
+        self._https = url.scheme == 'https'
+        self._host = url.hostname
+        self._port = url.port
+        self._path = url.path if url.path.endswith('/') else url.path + '/'
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            conn = cls(self._host, self._port, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def request(self, endpoint, params, post=False):
+        """Body of one E-utilities call, retried on connection errors, 429 and 5xx"""
+        params = dict(params)
+        if self.api_key:
+            params['api_key'] = self.api_key
+        query = parse.urlencode(params)
+        for attempt in range(self.retries + 1):
+            self.limiter.wait()
+            conn = self._connection()
+            try:
+                if post:
+                    conn.request('POST', self._path + endpoint, body=query,
+                                 headers={'Content-Type': 'application/x-www-form-urlencoded'})
+                else:
+                    conn.request('GET', self._path + endpoint + '?' + query)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, OSError):
+                self._drop_connection()
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+            if resp.status == 429 or resp.status >= 500:
+                if attempt == self.retries:
+                    raise RuntimeError(f'{endpoint} failed with HTTP {resp.status}')
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+            if resp.status != 200:
+                raise RuntimeError(f'{endpoint} failed with HTTP {resp.status}')
+            return body
+        raise RuntimeError(f'{endpoint} failed')
+
+    def esearch(self, term, retmax=100, db='nuccore'):
+        """Accession.version IDs matching a search term, paging past the 10,000 per-call limit"""
+        ids = []
+        while len(ids) < retmax:
+            page = min(ESEARCH_PAGE, retmax - len(ids))
+            body = self.request('esearch.fcgi', {
+                'db': db,
+                'term': term,
+                'idtype': 'acc',
+                'retmode': 'json',
+                'retstart': str(len(ids)),
+                'retmax': str(page),
+            })
+            result = json.loads(body).get('esearchresult', {})
+            batch = result.get('idlist', [])
+            ids.extend(batch)
+            if len(batch) < page or len(ids) >= int(result.get('count', 0)):
+                break
+        return ids
+
+    def efetch_fasta(self, ids, db='nuccore'):
+        """(header, sequence) records for one batch of IDs, fetched with a single efetch call"""
+        body = self.request('efetch.fcgi', {
+            'db': db,
+            'id': ','.join(ids),
+            'rettype': 'fasta',
+            'retmode': 'text',
+        }, post=True)
+        fasta = body.decode('utf-8', errors='ignore')
+        return [(header, clean_sequence(seq)) for header, seq in parse_records(fasta)]
+
+    def fetch_many(self, ids, db='nuccore'):
+        """Fetch every ID in batches on a bounded thread pool; records come back in request order"""
+        records = []
+        for batch in self.fetch_batches(ids, db):
+            records.extend(batch)
+        return records
+
+    def fetch_batches(self, ids, db='nuccore'):
+        """Yield (ids, records) for each efetch batch, in request order"""
+        batches = [ids[i:i + self.batch_size] for i in range(0, len(ids), self.batch_size)]
+        if not batches:
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        yield from self._pool.map(lambda b: (b, self.efetch_fasta(b, db)), batches)
+
+
+def is_offline():
+    return os.environ.get('BIOLAB_OFFLINE', '') not in ('', '0')
+
+
+def _record_text(header, seq):
+    return f'>{header}\n{seq}\n'
+
+
+def search_ids(term, retmax, client, cache=None, offline=None, db='nuccore', ttl=SEARCH_TTL):
+    """IDs for a search term, from the cache while the cached result is younger than ttl seconds
+
+    Offline, an expired result is still used (with a note on stderr).
+    """
+    cache = cache or default_cache()
+    offline = is_offline() if offline is None else offline
+    # results cached before esearch asked for accessions hold GI numbers; keep them apart
+    key = f'esearch:{db}:acc:{retmax}:{term}'
+    entry = cache.get_json(key)
+    if isinstance(entry, list):
+        # written before search results carried a timestamp
+        entry = {'time': 0, 'ids': entry}
+    if entry is not None:
+        if time.time() - entry['time'] < ttl:
+            return entry['ids']
+        if offline:
+            print(f'offline mode: using an expired search result for {term!r}', file=sys.stderr)
+            return entry['ids']
+    if offline:
+        raise RuntimeError(f'offline mode: search {term!r} is not cached')
+    ids = client.esearch(term, retmax=retmax, db=db)
+    if ids:
+        cache.put_json(key, {'time': time.time(), 'ids': ids})
+    return ids
+
+
+def _pair_records(batch, records):
+    """{id: (header, sequence)} for one efetch batch
+
+    efetch answers in request order, so a complete batch pairs by position.
+    When records were dropped, only records whose accession (with or without
+    version) equals a requested ID can be paired.
+    """
+    if len(records) == len(batch):
+        return dict(zip(batch, records))
+    by_accession = {}
+    for header, seq in records:
+        accession = header.split()[0] if header else ''
+        by_accession[accession] = (header, seq)
+        by_accession.setdefault(accession.split('.')[0], (header, seq))
+    return {uid: by_accession[uid] for uid in batch if uid in by_accession}
+
+
+def fetch_records(ids, client, cache=None, offline=None, db='nuccore'):
+    """{id: (header, sequence)} for the requested IDs, downloading only what the cache lacks
+
+    When a batch comes back short, the records that cannot be paired by
+    accession are fetched again one ID at a time. IDs that still could not be
+    retrieved are missing from the result and listed on stderr.
+    """
+    cache = cache or default_cache()
+    offline = is_offline() if offline is None else offline
+    found = {}
+    missing = []
+    for uid in dict.fromkeys(ids):
+        text = cache.get(f'{db}:{uid}')
+        if text is None:
+            missing.append(uid)
+        else:
+            for header, seq in parse_records(text):
+                found[uid] = (header, seq)
+    if missing and not offline:
+        for batch, records in client.fetch_batches(missing, db):
+            paired = _pair_records(batch, records)
+            if len(records) != len(batch):
+                print(f'efetch returned {len(records)} of {len(batch)} records; '
+                      f'retrying the unpaired IDs one at a time', file=sys.stderr)
+                for uid in batch:
+                    if uid not in paired:
+                        paired.update(_fetch_one(client, uid, db))
+            for uid, (header, seq) in paired.items():
+                found[uid] = (header, seq)
+                cache.put(f'{db}:{uid}', _record_text(header, seq))
+    unresolved = [uid for uid in missing if uid not in found]
+    if unresolved:
+        reason = 'not cached (offline mode)' if offline else 'not returned by efetch'
+        shown = ', '.join(unresolved[:10]) + (', ...' if len(unresolved) > 10 else '')
+        print(f'{len(unresolved)} of {len(missing)} records {reason}: {shown}', file=sys.stderr)
+    return found
+
+
+def _fetch_one(client, uid, db):
+    try:
+        records = client.efetch_fasta([uid], db)
+    except (RuntimeError, OSError, http.client.HTTPException):
+        return {}
+    return {uid: records[0]} if len(records) == 1 else {}
+
+
+def fetch_ncbi_sequence(min_len=1000, max_len=3000, retmax=100, api_key=None, seed=None,
+                        cache=None, offline=None, allow_fallback=True, client=None):
+    """One random genomic sequence with min_len..max_len bases
+
+    Returns {'accession', 'sequence', 'source'} where source is 'cache', 'ncbi'
+    or 'synthetic'. A synthetic fallback is reported on stderr and carries the
+    reason under 'error'; with allow_fallback=False the error is raised instead.
+    """
+    if seed is not None:
+        random.seed(seed)
+    cache = cache or default_cache()
+    own_client = client is None
+    if own_client:
+        client = EutilsClient(api_key=api_key)
+    try:
+        ids = search_ids(sequence_search_term(min_len, max_len), retmax, client, cache, offline)
+        if not ids:
+            raise RuntimeError('No IDs returned from NCBI search.')
+        picked = random.choice(ids)
+        hits = cache.hits
+        records = fetch_records([picked], client, cache, offline)
+        if picked not in records:
+            raise RuntimeError(f'Could not fetch sequence {picked}.')
+        header, seq = records[picked]
+        if not seq or not (min_len <= len(seq) <= max_len):
+            raise RuntimeError('Fetched sequence outside desired length or empty.')
+        return {'accession': header, 'sequence': seq, 'source': 'cache' if cache.hits > hits else 'ncbi'}
+    except Exception as e:
+        if not allow_fallback:
+            raise
+        print(f"Error fetching from NCBI: {e}", file=sys.stderr)
+        print("Falling back to synthetic random sequence...", file=sys.stderr)
+        L = random.randint(min_len, max_len)
+        seq = random_dna(L)
+        return {'accession': 'SYNTHETIC_RANDOM_SEQ', 'sequence': seq, 'source': 'synthetic', 'error': str(e)}
+    finally:
+        if own_client:
+            client.close()
+
+
+def fetch_ncbi_sequences(count, min_len=1000, max_len=3000, retmax=100, client=None, api_key=None, seed=None,
+                         cache=None, offline=None):
+    """Search once, then fetch `count` randomly picked hits concurrently
+
+    Returns a list of {'accession', 'sequence'} dicts; may hold fewer than
+    `count` entries if the search or some fetches come back short.
+    """
+    rng = random.Random(seed)
+    own_client = client is None
+    if own_client:
+        client = EutilsClient(api_key=api_key)
+    try:
+        ids = search_ids(sequence_search_term(min_len, max_len), max(retmax, count), client, cache, offline)
+        if not ids:
+            raise RuntimeError('No IDs returned from NCBI search.')
+        if count <= len(ids):
+            picked = rng.sample(ids, count)
+        else:
+            picked = [rng.choice(ids) for _ in range(count)]
+        records = fetch_records(picked, client, cache, offline)
+    finally:
+        if own_client:
+            client.close()
+    return [{'accession': records[uid][0], 'sequence': records[uid][1]}
+            for uid in picked if uid in records and records[uid][1]]
@@ -0,0 +1,183 @@
+"""2-bit packed DNA sequences.
+
+PackedSeq keeps four bases per byte (A=0, C=1, G=2, T=3, first base in the
+high bits) in a NumPy uint8 buffer, plus a 1-bit-per-base mask of N positions
+that is only allocated when the sequence has any. Slicing with step 1 returns
+a view on the same buffers, so sub-sequences cost nothing until they are
+decoded. codes() yields the same uint8 array as kmers.base_codes (N becomes
+INVALID), which is how the k-mer, repeat and Tm code consume a PackedSeq.
+It decodes only the bytes under the view; code that can work piece by piece
+walks iter_codes() instead, so a whole genome is never decoded at once.
+"""
+import numpy as np
+
+from common.fasta import read_records
+from common.kmers import INVALID, base_codes, encode_kmers
+
+_LETTERS = np.frombuffer(b'ACGTN', dtype=np.uint8)
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+CHUNK = 1 << 20
+
+
+def _pack(codes):
+    """Packed bytes and N-mask bits (or None) for a base_codes array"""
+    n = len(codes)
+    invalid = codes == INVALID
+    padded = np.zeros((n + 3) // 4 * 4, dtype=np.uint8)
+    padded[:n] = np.minimum(codes, 3)
+    quads = padded.reshape(-1, 4)
+    data = (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+    mask = np.packbits(invalid) if invalid.any() else None
+    return data, mask
+
+
+class PackedSeq:
+    """Immutable DNA sequence stored 2 bits per base
+
+    Anything other than A, C, G or T (either case) is stored as N.
+    """
+
+    __slots__ = ('_data', '_mask', '_start', '_len')
+
+    def __init__(self, seq=''):
+        if isinstance(seq, PackedSeq):
+            self._data, self._mask, self._start, self._len = seq._data, seq._mask, seq._start, seq._len
+            return
+        codes = np.asarray(seq, dtype=np.uint8) if isinstance(seq, np.ndarray) else base_codes(seq.upper())
+        self._data, self._mask = _pack(codes)
+        self._start = 0
+        self._len = len(codes)
+
+    @classmethod
+    def from_codes(cls, codes):
+        """Build from a uint8 array of base codes (0-3, INVALID for N)"""
+        return cls(np.asarray(codes, dtype=np.uint8))
+
+    def _view(self, start, length):
+        obj = PackedSeq.__new__(PackedSeq)
+        obj._data, obj._mask = self._data, self._mask
+        obj._start = self._start + start
+        obj._len = length
+        return obj
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def nbytes(self):
+        """Bytes held by the underlying buffers (shared with every view)"""
+        return self._data.nbytes + (self._mask.nbytes if self._mask is not None else 0)
+
+    @property
+    def packed(self):
+        """memoryview of the packed bytes covering this sequence (no copy)
+
+        The first base sits at bit offset 2 * (offset % 4) of the first byte.
+        """
+        return memoryview(self._data[self._start >> 2:(self._start + self._len + 3) >> 2])
+
+    @property
+    def offset(self):
+        return self._start
+
+    def has_n(self):
+        return self._mask is not None and bool(self._n_mask().any())
+
+    def _n_mask(self):
+        lo = self._start >> 3
+        bits = np.unpackbits(self._mask[lo:(self._start + self._len + 7) >> 3])
+        skip = self._start - (lo << 3)
+        return bits[skip:skip + self._len].astype(bool)
+
+    def _n_positions(self):
+        # only the mask bytes that have N bits are unpacked
+        lo = self._start >> 3
+        mask = self._mask[lo:(self._start + self._len + 7) >> 3]
+        hit = np.flatnonzero(mask)
+        bits = np.unpackbits(mask[hit]).reshape(-1, 8)
+        rows, cols = np.nonzero(bits)
+        pos = (hit[rows] + lo) * 8 + cols - self._start
+        return pos[(pos >= 0) & (pos < self._len)]
+
+    def codes(self):
+        """uint8 base codes, INVALID where the sequence has N
+
+        Only the packed bytes under this sequence are decoded, straight into
+        the returned array.
+        """
+        lo = self._start >> 2
+        chunk = self._data[lo:(self._start + self._len + 3) >> 2]
+        out = np.empty((len(chunk), 4), dtype=np.uint8)
+        np.right_shift(chunk[:, None], _SHIFTS, out=out)
+        np.bitwise_and(out, 3, out=out)
+        skip = self._start - (lo << 2)
+        codes = out.ravel()[skip:skip + self._len]
+        if self._mask is not None:
+            codes[self._n_positions()] = INVALID
+        return codes
+
+    def iter_codes(self, chunk_size=CHUNK):
+        """Yield the base codes chunk_size bases at a time"""
+        for start in range(0, self._len, chunk_size):
+            yield self._view(start, min(chunk_size, self._len - start)).codes()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._len)
+            if step == 1:
+                return self._view(start, max(stop - start, 0))
+            return PackedSeq.from_codes(self.codes()[key])
+        if key < 0:
+            key += self._len
+        if not 0 <= key < self._len:
+            raise IndexError("PackedSeq index out of range")
+        return str(self._view(key, 1))
+
+    def __str__(self):
+        return _LETTERS[self.codes()].tobytes().decode('ascii')
+
+    def __repr__(self):
+        text = str(self[:40]) + ('...' if self._len > 40 else '')
+        return f"PackedSeq('{text}', length={self._len})"
+
+    def __eq__(self, other):
+        # exact, so that equal objects hash alike: 'acgr' is not PackedSeq('ACGN')
+        if isinstance(other, str):
+            return str(self) == other
+        if not isinstance(other, PackedSeq):
+            return NotImplemented
+        return self._len == other._len and np.array_equal(self.codes(), other.codes())
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def reverse_complement(self):
+        codes = self.codes()[::-1]
+        return PackedSeq.from_codes(np.where(codes == INVALID, INVALID, 3 - codes))
+
+    def kmers(self, k):
+        """(k-mer codes, valid mask) for every window, as kmers.encode_kmers"""
+        return encode_kmers(self.codes(), k)
+
+    def iter_kmers(self, k):
+        """Yield (position, k-mer code) for every window without N"""
+        kmers, valid = self.kmers(k)
+        idx = np.flatnonzero(valid)
+        return zip(idx.tolist(), kmers[idx].tolist())
+
+    def to_fasta(self, header, line_width=60):
+        text = str(self)
+        lines = [text[i:i + line_width] for i in range(0, len(text), line_width)]
+        return '\n'.join([f'>{header}'] + lines) + '\n'
+
+
+def read_packed(path_or_lines):
+    """[(header, PackedSeq)] for every record of a FASTA file"""
+    return [(header, PackedSeq(seq)) for header, seq in read_records(path_or_lines)]
+
+
+def write_packed(path, records, line_width=60):
+    """Write (header, PackedSeq or str) records as FASTA"""
+    with open(path, 'w') as f:
+        for header, seq in records:
+            f.write(PackedSeq(seq).to_fasta(header, line_width))
@@ -0,0 +1,118 @@
+"""Headless plotting helpers.
+
+matplotlib is imported on first use only, always with the Agg backend, so
+compute-only runs never pay its start-up cost and nothing tries to open a
+display. Long series are decimated to roughly the number of pixels they will
+cover before they reach matplotlib; the output format follows the file
+extension (.png, .svg, ...).
+"""
+import numpy as np
+
+MARKER_LIMIT = 200
+
+
+def pyplot():
+    """matplotlib.pyplot, imported lazily with the non-interactive Agg backend"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def minmax_decimate(x, y, buckets):
+    """Keep the minimum and maximum of y in each of `buckets` equal index ranges
+
+    Peaks and troughs survive, which is what a line plot at that resolution
+    would show anyway. Points keep their original order; NaNs are ignored.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if buckets < 1 or 2 * buckets >= n:
+        return x, y
+    starts = np.linspace(0, n, buckets + 1).astype(np.intp)[:-1]
+    bucket = np.repeat(np.arange(buckets), np.diff(np.append(starts, n)))
+    keep = [[0, n - 1]]
+    for reduce in (np.fmin, np.fmax):
+        extreme = reduce.reduceat(y, starts)
+        hits = np.flatnonzero(y == extreme[bucket])
+        _, first = np.unique(bucket[hits], return_index=True)
+        keep.append(hits[first])
+    idx = np.unique(np.concatenate(keep))
+    return x[idx], y[idx]
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling to `threshold` points"""
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold < 3 or threshold >= n:
+        return x, y
+    xf = x.astype(float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    idx = np.empty(threshold, dtype=np.intp)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xf[hi:nhi].mean()
+        avg_y = np.nanmean(y[hi:nhi]) if np.any(~np.isnan(y[hi:nhi])) else y[a]
+        area = np.abs((xf[a] - avg_x) * (y[lo:hi] - y[a]) - (xf[a] - xf[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+
+def decimate(x, y, max_points, method='minmax'):
+    """Reduce a series to about max_points points with 'minmax' or 'lttb'"""
+    if method == 'minmax':
+        return minmax_decimate(x, y, max_points // 2)
+    if method == 'lttb':
+        return lttb(x, y, max_points)
+    raise ValueError(f"unknown decimation method {method!r}")
+
+
+def _finish(fig, ax, path, title, xlabel, ylabel, dpi, legend=False):
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    if legend:
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+    pyplot().close(fig)
+    return path
+
+
+def line_plot(path, x, series, title='', xlabel='', ylabel='', styles=None, max_points=None,
+              method='minmax', size=(10, 5), dpi=150):
+    """Save a line plot of {label: y} series sharing x to path
+
+    Each series is decimated to max_points (default: twice the plot width in
+    pixels); markers are only drawn when few points remain.
+    """
+    plt = pyplot()
+    if max_points is None:
+        max_points = 2 * int(size[0] * dpi)
+    styles = styles or {}
+    fig, ax = plt.subplots(figsize=size)
+    for label, y in series.items():
+        px, py = decimate(x, y, max_points, method)
+        style = dict(styles.get(label, {}))
+        if len(px) > MARKER_LIMIT:
+            style.pop('marker', None)
+        ax.plot(px, py, label=label, **style)
+    ax.grid(True)
+    return _finish(fig, ax, path, title, xlabel, ylabel, dpi, legend=len(series) > 1)
+
+
+def bar_plot(path, labels, values, title='', xlabel='', ylabel='', size=(10, 6), dpi=150, **style):
+    """Save a bar chart to path"""
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=size)
+    ax.bar(labels, values, **style)
+    ax.set_xticks(labels)
+    ax.grid(axis='y', alpha=0.3)
+    return _finish(fig, ax, path, title, xlabel, ylabel, dpi)
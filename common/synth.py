@@ -0,0 +1,162 @@
+"""Synthetic DNA for tests, demos and load testing.
+
+SyntheticGenome draws bases with NumPy in fixed-size blocks, each from its own
+generator derived from (seed, block index). Any region can therefore be built
+on its own, and the bases are the same whatever chunk size a caller streams
+with. Injected tandem repeats overwrite bases in place, so coordinates do not
+shift.
+"""
+import argparse
+import bisect
+import random
+
+import numpy as np
+
+BLOCK = 1 << 20
+FASTA_LINE = 60
+_LETTERS = np.frombuffer(b'ACGT', dtype=np.uint8)
+
+
+def _decode(codes):
+    return _LETTERS[codes].tobytes().decode('ascii')
+
+
+def plan_repeats(length, count, unit_len=(2, 6), copies=(5, 30), seed=None):
+    """Non-overlapping (position, unit, copies) tandem repeats spread over a sequence"""
+    rng = np.random.default_rng(seed)
+    plan = []
+    taken = []
+    for _ in range(count):
+        unit = _decode(rng.integers(0, 4, int(rng.integers(unit_len[0], unit_len[1] + 1))))
+        n = int(rng.integers(copies[0], copies[1] + 1))
+        span = len(unit) * n
+        if span > length:
+            continue
+        pos = int(rng.integers(0, length - span + 1))
+        i = bisect.bisect_left(taken, (pos,))
+        if (i > 0 and taken[i - 1][1] > pos) or (i < len(taken) and taken[i][0] < pos + span):
+            continue
+        taken.insert(i, (pos, pos + span))
+        plan.append((pos, unit, n))
+    plan.sort()
+    return plan
+
+
+class SyntheticGenome:
+    def __init__(self, length, gc=0.5, seed=None, repeats=()):
+        if not 0 <= gc <= 1:
+            raise ValueError(f"gc must be between 0 and 1, got {gc}")
+        self.length = length
+        self.gc = gc
+        self.seed = np.random.SeedSequence(seed).entropy
+        self.repeats = sorted(repeats)
+        self._repeat_starts = [r[0] for r in self.repeats]
+        self._cumulative = np.cumsum([(1 - gc) / 2, gc / 2, gc / 2])
+
+    def __len__(self):
+        return self.length
+
+    def block_codes(self, index):
+        """Base codes (0-3 for ACGT) of block `index`"""
+        start = index * BLOCK
+        size = min(BLOCK, self.length - start)
+        if size <= 0:
+            return np.zeros(0, dtype=np.uint8)
+        rng = np.random.Generator(np.random.PCG64(np.random.SeedSequence(self.seed, spawn_key=(index,))))
+        codes = np.searchsorted(self._cumulative, rng.random(size), side='right').astype(np.uint8)
+        self._overlay_repeats(codes, start)
+        return codes
+
+    def _overlay_repeats(self, codes, start):
+        end = start + len(codes)
+        i = max(0, bisect.bisect_right(self._repeat_starts, start) - 1)
+        while i < len(self.repeats) and self.repeats[i][0] < end:
+            pos, unit, copies = self.repeats[i]
+            i += 1
+            span = len(unit) * copies
+            lo, hi = max(pos, start), min(pos + span, end)
+            if lo >= hi:
+                continue
+            unit_codes = np.searchsorted(_LETTERS, np.frombuffer(unit.encode('ascii'), dtype=np.uint8))
+            phase = np.arange(lo - pos, hi - pos) % len(unit)
+            codes[lo - start:hi - start] = unit_codes[phase]
+
+    def codes(self, start=0, end=None):
+        end = self.length if end is None else min(end, self.length)
+        if start >= end:
+            return np.zeros(0, dtype=np.uint8)
+        parts = [self.block_codes(b) for b in range(start // BLOCK, (end - 1) // BLOCK + 1)]
+        offset = (start // BLOCK) * BLOCK
+        return np.concatenate(parts)[start - offset:end - offset]
+
+    def fetch(self, start=0, end=None):
+        return _decode(self.codes(start, end))
+
+    def sequence(self):
+        return self.fetch()
+
+    def chunks(self, chunk_size=BLOCK):
+        """Yield the sequence as consecutive strings of chunk_size bases"""
+        cached_index = None
+        cached = None
+        for start in range(0, self.length, chunk_size):
+            end = min(start + chunk_size, self.length)
+            if chunk_size >= BLOCK:
+                yield self.fetch(start, end)
+                continue
+            index = start // BLOCK
+            if index != cached_index:
+                cached_index, cached = index, self.block_codes(index)
+            lo = start - index * BLOCK
+            piece = cached[lo:lo + (end - start)]
+            if len(piece) < end - start:
+                cached_index, cached = index + 1, self.block_codes(index + 1)
+                piece = np.concatenate((piece, cached[:end - start - len(piece)]))
+            yield _decode(piece)
+
+
+def write_fasta(path, genomes, line_width=FASTA_LINE, lines_per_chunk=16384):
+    """Stream (name, SyntheticGenome) records to a FASTA file without building whole sequences"""
+    with open(path, 'w') as out:
+        for name, genome in genomes:
+            out.write(f'>{name}\n')
+            for chunk in genome.chunks(line_width * lines_per_chunk):
+                for i in range(0, len(chunk), line_width):
+                    out.write(chunk[i:i + line_width])
+                    out.write('\n')
+
+
+def random_dna(length, gc=0.5, seed=None):
+    """Random sequence; without a seed it follows the state of the `random` module"""
+    if seed is None:
+        seed = random.getrandbits(64)
+    return SyntheticGenome(length, gc, seed).sequence()
+
+
+def _size(text):
+    text = text.strip().upper()
+    scale = {'K': 10 ** 3, 'M': 10 ** 6, 'G': 10 ** 9}.get(text[-1:], 1)
+    return int(float(text.rstrip('KMG')) * scale)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic genome to FASTA')
+    parser.add_argument('output')
+    parser.add_argument('--length', type=_size, default=_size('1M'), help='bases per record, e.g. 250k, 100M, 3G')
+    parser.add_argument('--records', type=int, default=1)
+    parser.add_argument('--gc', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=0, help='tandem repeats to inject per record')
+    args = parser.parse_args(argv)
+
+    def genomes():
+        for i in range(args.records):
+            plan = plan_repeats(args.length, args.repeats, seed=[args.seed, i, 1]) if args.repeats else ()
+            yield (f'synthetic_{i + 1} length={args.length} gc={args.gc}',
+                   SyntheticGenome(args.length, args.gc, [args.seed, i], plan))
+
+    write_fasta(args.output, genomes())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,51 @@
+import argparse
 import math
+import os
+import sys
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.fasta import read_records
+from common.kmers import INVALID, base_codes
+from common.packed import PackedSeq
+
+R = 1.987  # cal/(K*mol)
+
+# SantaLucia (1998) unified nearest-neighbor parameters, dH in kcal/mol and dS in cal/(K*mol)
+NN_PARAMS = {
+    'AA': (-7.9, -22.2), 'TT': (-7.9, -22.2),
+    'AT': (-7.2, -20.4),
+    'TA': (-7.2, -21.3),
+    'CA': (-8.5, -22.7), 'TG': (-8.5, -22.7),
+    'GT': (-8.4, -22.4), 'AC': (-8.4, -22.4),
+    'CT': (-7.8, -21.0), 'AG': (-7.8, -21.0),
+    'GA': (-8.2, -22.2), 'TC': (-8.2, -22.2),
+    'CG': (-10.6, -27.2),
+    'GC': (-9.8, -24.4),
+    'GG': (-8.0, -19.9), 'CC': (-8.0, -19.9),
+}
+INIT_GC = (0.1, -2.8)
+INIT_AT = (2.3, 4.1)
+SYMMETRY_DS = -1.4
+
+
+def _nn_tables():
+    # 5x5 tables indexed by base codes; pairs with a non-ACGT base give NaN
+    dh = np.full((5, 5), np.nan)
+    ds = np.full((5, 5), np.nan)
+    for pair, (h, s) in NN_PARAMS.items():
+        i, j = ('ACGT'.index(pair[0]), 'ACGT'.index(pair[1]))
+        dh[i, j] = h
+        ds[i, j] = s
+    init_dh = np.array([INIT_AT[0], INIT_GC[0], INIT_GC[0], INIT_AT[0], np.nan])
+    init_ds = np.array([INIT_AT[1], INIT_GC[1], INIT_GC[1], INIT_AT[1], np.nan])
+    return dh.ravel(), ds.ravel(), init_dh, init_ds
+
+
+NN_DH, NN_DS, INIT_DH, INIT_DS = _nn_tables()
+
 
 def compute_tm1(dna):
     dna = dna.upper()
@@ -9,18 +56,123 @@ def compute_tm1(dna):
     tm1 = 4*(g+c)+2*(a+t)
     return tm1
 
-def compute_tm2(dna):
+def compute_tm2(dna, na=0.01):
     dna = dna.upper()
     a = dna.count('A')
     t = dna.count('T')
     g = dna.count('G')
     c = dna.count('C')
     gc_percent = ((g + c) / len(dna)) * 100
-    Nat = 0.01
-    tm2=81.5+16.6*(math.log10(Nat))+.41*gc_percent-600/len(dna)
+    tm2=81.5+16.6*(math.log10(na))+.41*gc_percent-600/len(dna)
     return tm2
 
+def encode_oligos(oligos):
+    """uint8 matrix of base codes (A=0, C=1, G=2, T=3, other=4), one row per equal-length oligo
+
+    Oligos may be strings or PackedSeq.
+    """
+    oligos = list(oligos)
+    if not oligos:
+        return np.zeros((0, 0), dtype=np.uint8)
+    length = len(oligos[0])
+    if any(len(o) != length for o in oligos):
+        raise ValueError("all oligos in a batch must have the same length")
+    if any(isinstance(o, PackedSeq) for o in oligos):
+        return np.stack([base_codes(o if isinstance(o, PackedSeq) else o.upper()) for o in oligos])
+    return base_codes(''.join(oligos).upper()).reshape(len(oligos), length)
+
+def genome_kmers(seq, k):
+    """Every k-mer of a sequence (str or PackedSeq) as a code matrix; a strided view, nothing is copied"""
+    codes = base_codes(seq if isinstance(seq, PackedSeq) else seq.upper())
+    if len(codes) < k:
+        return np.zeros((0, k), dtype=np.uint8)
+    return sliding_window_view(codes, k)
+
+def _gc_at(matrix):
+    gc = np.count_nonzero((matrix == 1) | (matrix == 2), axis=1)
+    at = np.count_nonzero((matrix == 0) | (matrix == 3), axis=1)
+    return gc, at
+
+def batch_tm_wallace(matrix):
+    """compute_tm1 for every row of a code matrix"""
+    gc, at = _gc_at(matrix)
+    return 4*gc + 2*at
+
+def batch_tm_salt(matrix, na=0.01):
+    """compute_tm2 (salt-adjusted GC formula) for every row, Na+ in mol/L"""
+    length = matrix.shape[1]
+    gc, _ = _gc_at(matrix)
+    return 81.5 + 16.6*math.log10(na) + 0.41*(gc*100/length) - 600/length
+
+def batch_tm_nn(matrix, oligo_conc=250e-9, na=0.01):
+    """SantaLucia (1998) nearest-neighbor Tm for every row
+
+    oligo_conc is the total strand concentration and na the Na+ concentration,
+    both in mol/L. Rows holding anything other than ACGT come out as NaN.
+    """
+    matrix = np.asarray(matrix)
+    n, length = matrix.shape
+    if length < 2:
+        return np.full(n, np.nan)
+    pairs = matrix[:, :-1].astype(np.intp)*5 + matrix[:, 1:]
+    dh = NN_DH[pairs].sum(axis=1) + INIT_DH[matrix[:, 0]] + INIT_DH[matrix[:, -1]]
+    ds = NN_DS[pairs].sum(axis=1) + INIT_DS[matrix[:, 0]] + INIT_DS[matrix[:, -1]]
+    # self-complementary duplexes get the symmetry term and use C_T instead of C_T/4
+    self_comp = np.all(matrix == np.where(matrix[:, ::-1] == INVALID, INVALID, 3 - matrix[:, ::-1]), axis=1)
+    ds = ds + np.where(self_comp, SYMMETRY_DS, 0.0) + 0.368*(length - 1)*math.log(na)
+    conc = np.where(self_comp, oligo_conc, oligo_conc/4)
+    return dh*1000/(ds + R*np.log(conc)) - 273.15
+
+def batch_tm(matrix, na=0.01, oligo_conc=250e-9):
+    """(wallace, salt_adjusted, nearest_neighbor) Tm arrays for a code matrix"""
+    return batch_tm_wallace(matrix), batch_tm_salt(matrix, na), batch_tm_nn(matrix, oligo_conc, na)
+
+def _screen(rows, names, args, out):
+    wallace, salt, nn = batch_tm(rows, args.na, args.oligo_conc)
+    keep = np.ones(len(nn), dtype=bool)
+    if args.min_tm is not None:
+        keep &= nn >= args.min_tm
+    if args.max_tm is not None:
+        keep &= nn <= args.max_tm
+    letters = np.frombuffer(b'ACGTN', dtype=np.uint8)
+    for i in np.flatnonzero(keep).tolist():
+        oligo = letters[rows[i]].tobytes().decode('ascii')
+        out.write(f"{names(i)}\t{oligo}\t{wallace[i]}\t{salt[i]:.2f}\t{nn[i]:.2f}\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Melting temperatures of oligos: Wallace, salt-adjusted and "
+                                                 "SantaLucia nearest-neighbor.")
+    parser.add_argument("sequences", nargs="*", help="oligos to evaluate (read from stdin, one per line, if none "
+                                                     "are given and --fasta is not used)")
+    parser.add_argument("--fasta", help="screen every k-mer of every record in this FASTA file")
+    parser.add_argument("-k", type=int, default=20, help="k-mer length for --fasta (default: 20)")
+    parser.add_argument("--na", type=float, default=0.01,
+                        help="Na+ concentration in mol/L (default: 0.01, as compute_tm2)")
+    parser.add_argument("--oligo-conc", type=float, default=250e-9,
+                        help="total oligo concentration in mol/L (default: 250e-9)")
+    parser.add_argument("--min-tm", type=float, help="only report oligos with nearest-neighbor Tm >= this")
+    parser.add_argument("--max-tm", type=float, help="only report oligos with nearest-neighbor Tm <= this")
+    parser.add_argument("--batch", type=int, default=1_000_000, help="oligos per vectorised batch")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout
+    out.write("id\toligo\ttm_wallace\ttm_salt\ttm_nn\n")
+    if args.fasta:
+        for header, seq in read_records(args.fasta):
+            name = header.split()[0] if header else ''
+            kmers = genome_kmers(seq, args.k)
+            for start in range(0, len(kmers), args.batch):
+                _screen(kmers[start:start+args.batch], lambda i, s=start: f"{name}:{s+i+1}", args, out)
+        return
+    sequences = args.sequences or [line.strip() for line in sys.stdin if line.strip()]
+    by_length = {}
+    for i, seq in enumerate(sequences):
+        by_length.setdefault(len(seq), []).append(i)
+    for length, indices in by_length.items():
+        for start in range(0, len(indices), args.batch):
+            batch = indices[start:start+args.batch]
+            rows = encode_oligos(sequences[i] for i in batch)
+            _screen(rows, lambda i, idx=batch: str(idx[i]+1), args, out)
+
 if __name__ == "__main__":
-    seq = input("Enter DNA sequence: ").strip()
-    print("tm1=", compute_tm1(seq), " C")
-    print("tm2=", compute_tm2(seq), " C")
+    main()
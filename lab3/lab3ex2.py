@@ -1,14 +1,19 @@
+import argparse
+import os
 import sys
 import math
-import matplotlib.pyplot as plt
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.fasta import read_records
+from common.kmers import base_codes
+from common.packed import PackedSeq
+from common.plotting import line_plot
+
+NA_CONC = 0.01
 
 def read_fasta(sequence):
-    seq = []
-    with open(sequence) as f:
-        for line in f:
-            if not line.startswith('>'):
-                seq.append(line.strip())
-    return ''.join(seq)
+    return ''.join(seq for _, seq in read_records(sequence))
 
 def tm(sequence):
     a = sequence.count('A')
@@ -24,52 +29,90 @@ def tm2(sequence):
     g = sequence.count('G')
     c = sequence.count('C')
     gc_percent = ((g+c)/len(sequence))*100
-    Nat = 0.01
-    return 81.5+16.6*math.log10(Nat)+0.41*gc_percent-600/len(sequence)
+    return 81.5+16.6*math.log10(NA_CONC)+0.41*gc_percent-600/len(sequence)
+
+def base_cumsums(sequence):
+    """Running G+C and A+T counts: gc[i] and at[i] count the bases in sequence[:i]
+
+    sequence may be a string or a PackedSeq, which is decoded a chunk at a time.
+    """
+    if isinstance(sequence, PackedSeq):
+        chunks = sequence.iter_codes()
+    else:
+        chunks = [base_codes(sequence.upper())]
+    gc = np.zeros(len(sequence)+1, dtype=np.int64)
+    at = np.zeros(len(sequence)+1, dtype=np.int64)
+    pos = 0
+    for codes in chunks:
+        end = pos+len(codes)
+        np.cumsum((codes == 1) | (codes == 2), out=gc[pos+1:end+1])
+        np.cumsum((codes == 0) | (codes == 3), out=at[pos+1:end+1])
+        gc[pos+1:end+1] += gc[pos]
+        at[pos+1:end+1] += at[pos]
+        pos = end
+    return gc, at
+
+def window_tm_profile(sequence, window_sizes=(8,)):
+    """Tm1/Tm2 for every window of every size in one pass over the sequence.
+
+    Returns {window_size: (positions, tm1, tm2)} with 1-based start positions.
+    Each window costs O(1): its base counts are a difference of two running sums.
+    """
+    if isinstance(window_sizes, int):
+        window_sizes = (window_sizes,)
+    gc, at = base_cumsums(sequence)
+    n = len(gc)-1
+    profiles = {}
+    for w in window_sizes:
+        if w < 1:
+            raise ValueError(f"window size must be positive, got {w}")
+        count = max(n-w+1, 0)
+        gc_w = gc[w:w+count] - gc[:count]
+        at_w = at[w:w+count] - at[:count]
+        tm1_values = 4*gc_w + 2*at_w
+        tm2_values = (81.5+16.6*math.log10(NA_CONC)-600/w) + 0.41*(gc_w*(100/w))
+        profiles[w] = (np.arange(1, count+1), tm1_values, tm2_values)
+    return profiles
 
 def sliding_window_tm(sequence, window_size=8):
+    positions, tm1_values, tm2_values = window_tm_profile(sequence, window_size)[window_size]
     results = []
-    for i in range(len(sequence)-window_size+1):
-        window_seq = sequence[i:i+window_size]
-        temp1 = tm(window_seq)
-        temp2 = tm2(window_seq)
-        results.append((i+1, window_seq, temp1, temp2))
+    for pos, temp1, temp2 in zip(positions.tolist(), tm1_values.tolist(), tm2_values.tolist()):
+        results.append((pos, sequence[pos-1:pos-1+window_size], temp1, temp2))
     return results
 
-def main():
-    if len(sys.argv)!=2:
-        print("Usage: python lab3ex2.py <input.fasta>")
-        sys.exit(1)
-    
-    fasta_file = sys.argv[1]
-    sequence = read_fasta(fasta_file)
-    window_size = 8
-    results = sliding_window_tm(sequence, window_size)
-    
-    print("Pos\tSequence\tTm1(C)\tTm2(C)")
-    for pos, seq, temp1, temp2 in results:
-        print(f"{pos}\t{seq}\t{temp1}\t{temp2:.2f}")
-    
-    # prepare data for plotting
-    positions = [pos for pos, _, _, _ in results]
-    tm1_values = [temp1 for _, _, temp1, _ in results]
-    tm2_values = [temp2 for _, _, _, temp2 in results]
-    
-    # plot
-    plt.figure(figsize=(10, 5))
-    plt.plot(positions, tm1_values, marker='o', color='royalblue', label='Tm1 (simple formula)')
-    plt.plot(positions, tm2_values, marker='s', color='darkorange', label='Tm2 (Wallace rule)')
-    plt.title("Melting Temperature (Tm) Across DNA Sequence")
-    plt.xlabel("Position (start of 8-mer window)")
-    plt.ylabel("Tm (C)")
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sliding-window melting temperature profile of a FASTA file.")
+    parser.add_argument("fasta", help="input FASTA file")
+    parser.add_argument("-w", "--window", type=int, default=8, help="window size (default: 8)")
+    parser.add_argument("--plot-format", choices=("png", "svg"), default="png", help="plot file format")
+    parser.add_argument("--no-plot", action="store_true", help="only print the table")
+    parser.add_argument("--max-points", type=int, help="points per plotted series after decimation")
+    parser.add_argument("--decimate", choices=("minmax", "lttb"), default="minmax", help="decimation method")
+    args = parser.parse_args(argv)
     
-    # save and show
-    plt.savefig("tm_plot.png", dpi=300)
-    print("\n✅ Plot saved as 'tm_plot.png'")
-    plt.show()
+    window_size = args.window
+    for index, (header, sequence) in enumerate(read_records(args.fasta)):
+        positions, tm1_values, tm2_values = window_tm_profile(sequence, window_size)[window_size]
+        
+        if index:
+            print()
+        print(f">{header}")
+        print("Pos\tSequence\tTm1(C)\tTm2(C)")
+        for pos, temp1, temp2 in zip(positions.tolist(), tm1_values.tolist(), tm2_values.tolist()):
+            print(f"{pos}\t{sequence[pos-1:pos-1+window_size]}\t{temp1}\t{temp2:.2f}")
+        
+        if args.no_plot or not len(positions):
+            continue
+        plot_file = f"tm_plot.{args.plot_format}" if index == 0 else f"tm_plot_{index+1}.{args.plot_format}"
+        line_plot(plot_file, positions,
+                  {'Tm1 (simple formula)': tm1_values, 'Tm2 (Wallace rule)': tm2_values},
+                  title=f"Melting Temperature (Tm) Across {header or 'DNA Sequence'}",
+                  xlabel=f"Position (start of {window_size}-mer window)", ylabel="Tm (C)",
+                  styles={'Tm1 (simple formula)': {'marker': 'o', 'color': 'royalblue'},
+                          'Tm2 (Wallace rule)': {'marker': 's', 'color': 'darkorange'}},
+                  max_points=args.max_points, method=args.decimate, dpi=300)
+        print(f"\n✅ Plot saved as '{plot_file}'")
 
 if __name__ == "__main__":
     main()
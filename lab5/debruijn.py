@@ -0,0 +1,172 @@
+"""De Bruijn graph assembly of the reads produced by lab5ex1.take_reads.
+
+Read k-mers are counted with NumPy in batches, so that part grows with the
+total number of read bases. The graph itself is built over distinct k-mers
+only: nodes are (k-1)-mers, every distinct k-mer is an edge, runs of
+one-in/one-out nodes are compacted into unitigs and the unitig graph is
+walked with Hierholzer's algorithm.
+"""
+import os
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.kmers import MAX_K, decode_kmer, encode_kmers
+
+READ_BATCH = 50000
+
+
+def count_read_kmers(reads, k, batch_size=READ_BATCH):
+    """Distinct k-mer codes over all reads and how many times each was seen"""
+    keys = np.zeros(0, dtype=np.uint64)
+    counts = np.zeros(0, dtype=np.int64)
+    for start in range(0, len(reads), batch_size):
+        # N between reads invalidates every window spanning two reads
+        kmers, valid = encode_kmers('N'.join(reads[start:start + batch_size]), k)
+        batch_keys, batch_counts = np.unique(kmers[valid], return_counts=True)
+        keys, inverse = np.unique(np.concatenate((keys, batch_keys)), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate((counts, batch_counts)),
+                             minlength=len(keys)).astype(np.int64)
+    return keys, counts
+
+
+def build_unitigs(keys, counts, k):
+    """Compact the de Bruijn graph into unitigs
+
+    Returns a list of (source_node, target_node, sequence, mean_kmer_count) where
+    nodes are indices into the sorted array of distinct (k-1)-mers.
+    """
+    mask = np.uint64((1 << (2 * (k - 1))) - 1)
+    prefix = keys >> np.uint64(2)
+    suffix = keys & mask
+    nodes = np.unique(np.concatenate((prefix, suffix)))
+    src = np.searchsorted(nodes, prefix)
+    dst = np.searchsorted(nodes, suffix)
+    outdeg = np.bincount(src, minlength=len(nodes))
+    indeg = np.bincount(dst, minlength=len(nodes))
+    internal = ((outdeg == 1) & (indeg == 1)).tolist()
+
+    order = np.argsort(src, kind='stable')
+    first_edge = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(outdeg, out=first_edge[1:])
+    out_edges = order.tolist()
+    first_edge = first_edge.tolist()
+    src = src.tolist()
+    dst = dst.tolist()
+    last_base = (keys & np.uint64(3)).tolist()
+    counts = counts.tolist()
+    used = [False] * len(keys)
+
+    def walk(edge):
+        start = src[edge]
+        bases = [decode_kmer(nodes[start], k - 1)]
+        total = 0
+        length = 0
+        while True:
+            used[edge] = True
+            bases.append('ACGT'[last_base[edge]])
+            total += counts[edge]
+            length += 1
+            node = dst[edge]
+            if not internal[node]:
+                break
+            edge = out_edges[first_edge[node]]
+            if used[edge]:
+                break
+        return (start, node, ''.join(bases), total / length)
+
+    unitigs = []
+    for node in range(len(nodes)):
+        if internal[node]:
+            continue
+        for i in range(first_edge[node], first_edge[node + 1]):
+            edge = out_edges[i]
+            if not used[edge]:
+                unitigs.append(walk(edge))
+    # whatever is left lies on isolated cycles
+    for edge in range(len(keys)):
+        if not used[edge]:
+            unitigs.append(walk(edge))
+    return unitigs
+
+
+def eulerian_trails(unitigs, multiplicities, k):
+    """Spell contigs by walking the unitig graph with Hierholzer's algorithm
+
+    Each unitig is used as many times as its multiplicity. When the graph has
+    no Eulerian path the walk is split into trails wherever it is discontinuous.
+    """
+    adjacency = defaultdict(list)
+    balance = defaultdict(int)
+    for i, (source, target, _, _) in enumerate(unitigs):
+        for _ in range(multiplicities[i]):
+            adjacency[source].append(i)
+            balance[source] += 1
+            balance[target] -= 1
+    for edges in adjacency.values():
+        edges.reverse()
+    starts = sorted(node for node, b in balance.items() if b > 0)
+    starts += sorted(adjacency)
+
+    path = []
+    for start in starts:
+        if not adjacency[start]:
+            continue
+        stack = [(start, None)]
+        tour = []
+        while stack:
+            node, edge = stack[-1]
+            if adjacency[node]:
+                nxt = adjacency[node].pop()
+                stack.append((unitigs[nxt][1], nxt))
+            else:
+                stack.pop()
+                if edge is not None:
+                    tour.append(edge)
+        path.extend(reversed(tour))
+        path.append(None)
+
+    contigs = []
+    current = None
+    previous = None
+    for edge in path:
+        if edge is None or (previous is not None and unitigs[previous][1] != unitigs[edge][0]):
+            if current:
+                contigs.append(''.join(current))
+            current = None
+            previous = None
+        if edge is None:
+            continue
+        if current is None:
+            current = [unitigs[edge][2]]
+        else:
+            current.append(unitigs[edge][2][k - 1:])
+        previous = edge
+    if current:
+        contigs.append(''.join(current))
+    return contigs
+
+
+def debruijn_contigs(reads, k=31, min_count=1):
+    """All contigs spelled from the reads' de Bruijn graph, longest first"""
+    if not 2 <= k <= MAX_K:
+        raise ValueError(f"k must be between 2 and {MAX_K}, got {k}")
+    keys, counts = count_read_kmers(reads, k)
+    keep = counts >= min_count
+    keys, counts = keys[keep], counts[keep]
+    if not len(keys):
+        return []
+    unitigs = build_unitigs(keys, counts, k)
+    # repeats collapse into one unitig; estimate how often the genome passes through it from coverage
+    coverage = np.median([u[3] for u in unitigs if len(u[2]) >= 2 * k] or [u[3] for u in unitigs])
+    multiplicities = [max(1, int(round(u[3] / coverage))) for u in unitigs]
+    contigs = eulerian_trails(unitigs, multiplicities, k)
+    contigs.sort(key=len, reverse=True)
+    return contigs
+
+
+def assemble_reads_debruijn(reads, k=31, min_count=1):
+    contigs = debruijn_contigs(reads, k, min_count)
+    return contigs[0] if contigs else ""
@@ -0,0 +1,184 @@
+"""Error-tolerant read overlaps from minimizer sketches.
+
+Every read is reduced to its (w, k)-minimizers. Reads sharing enough
+minimizers become candidate pairs, so the candidate search grows with the
+number of minimizers times coverage instead of with all read pairs. Each
+candidate is then verified by aligning the end of one read against the start
+of the other, within a band around the overlap the minimizers predict.
+"""
+import os
+import sys
+from collections import defaultdict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.kmers import encode_kmers
+
+HASH_MULT = np.uint64(0x9E3779B97F4A7C15)
+NO_HASH = np.iinfo(np.uint64).max
+
+
+def read_minimizers(reads, k=15, w=10):
+    """(hashes, read_ids, positions) of the (w, k)-minimizers of every read"""
+    offsets = np.zeros(len(reads) + 1, dtype=np.int64)
+    np.cumsum([len(r) + 1 for r in reads], out=offsets[1:])
+    kmers, valid = encode_kmers('N'.join(reads) + 'N', k)
+    # multiplying by an odd constant scrambles the order so poly-A k-mers do not always win
+    hashes = np.where(valid, kmers * HASH_MULT, NO_HASH)
+    if len(hashes) < w:
+        empty = np.zeros(0, dtype=np.int64)
+        return np.zeros(0, dtype=np.uint64), empty, empty
+    picks = sliding_window_view(hashes, w).argmin(axis=1) + np.arange(len(hashes) - w + 1)
+    picks = np.unique(picks)
+    picks = picks[hashes[picks] != NO_HASH]
+    read_ids = np.searchsorted(offsets, picks, side='right') - 1
+    return hashes[picks], read_ids, picks - offsets[read_ids]
+
+
+def candidate_pairs(reads, k=15, w=10, min_shared=2, max_occurrences=None):
+    """Read pairs sharing minimizers as arrays (a, b, shared, diagonal)
+
+    Read b is expected to start at a[diagonal] (diagonal >= 0). Minimizers found
+    in more than max_occurrences places are treated as repeats and ignored.
+    """
+    hashes, read_ids, positions = read_minimizers(reads, k, w)
+    empty = np.zeros(0, dtype=np.int64)
+    if not len(hashes):
+        return empty, empty, empty, empty
+    order = np.argsort(hashes, kind='stable')
+    hashes, read_ids, positions = hashes[order], read_ids[order], positions[order]
+    starts = np.concatenate(([0], np.flatnonzero(hashes[1:] != hashes[:-1]) + 1))
+    sizes = np.diff(np.append(starts, len(hashes)))
+    if max_occurrences is None:
+        # typical bucket size seen from a minimizer occurrence, i.e. the read coverage
+        shared_sizes = sizes[sizes > 1]
+        coverage = np.median(np.repeat(shared_sizes, shared_sizes)) if len(shared_sizes) else 4
+        max_occurrences = max(16, int(4 * coverage))
+    keep = (sizes > 1) & (sizes <= max_occurrences)
+    starts, sizes = starts[keep], sizes[keep]
+    if not len(sizes):
+        return empty, empty, empty, empty
+
+    # all ordered (i, j) entry pairs inside each bucket, then keep i < j
+    squares = sizes * sizes
+    base = np.repeat(starts, squares)
+    width = np.repeat(sizes, squares)
+    q = np.arange(squares.sum()) - np.repeat(np.cumsum(squares) - squares, squares)
+    i = base + q // width
+    j = base + q % width
+    keep = (i < j) & (read_ids[i] != read_ids[j])
+    i, j = i[keep], j[keep]
+    diag = positions[i] - positions[j]
+    a = np.where(diag >= 0, read_ids[i], read_ids[j])
+    b = np.where(diag >= 0, read_ids[j], read_ids[i])
+    diag = np.abs(diag)
+
+    pair = a * len(reads) + b
+    pairs, inverse, shared = np.unique(pair, return_inverse=True, return_counts=True)
+    mean_diag = np.bincount(inverse, weights=diag) / shared
+    keep = shared >= min_shared
+    pairs, shared, mean_diag = pairs[keep], shared[keep], mean_diag[keep]
+    return pairs // len(reads), pairs % len(reads), shared, np.rint(mean_diag).astype(np.int64)
+
+
+def prefix_distances(a, b):
+    """Yield the edit distance of a against b[:j] for j = 1 .. len(b)
+
+    Bit-parallel global alignment (Myers/Hyyro): one pass over b with the
+    pattern a packed into an integer. a must not be empty.
+    """
+    m = len(a)
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    peq = defaultdict(int)
+    for pos, c in enumerate(a):
+        peq[c] |= 1 << pos
+    pv = full
+    mv = 0
+    score = m
+    for c in b:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+        yield score
+
+
+def edit_distance(a, b):
+    """Global edit distance of a and b in one bit-parallel pass (cheapest with a the shorter)"""
+    if not a:
+        return len(b)
+    score = len(a)
+    for score in prefix_distances(a, b):
+        pass
+    return score
+
+
+def overlap_distance(a_end, b, band):
+    """Edit distance of a_end against the best prefix of b, and that prefix length
+
+    Only prefixes of b within `band` of len(a_end) are considered.
+    """
+    m = len(a_end)
+    if m == 0:
+        return 0, 0
+    best = (m, 0)
+    for j, score in enumerate(prefix_distances(a_end, b[:m + band]), 1):
+        if j >= m - band and (score < best[0] or (score == best[0] and abs(j - m) < abs(best[1] - m))):
+            best = (score, j)
+    return best
+
+
+def find_overlaps(reads, min_olap=30, k=15, w=10, min_shared=2, max_error=0.15, band=None,
+                  max_candidates=8):
+    """Overlap graph of reads that tolerates sequencing errors
+
+    Returns {a: [(b, offset, b_overlap, errors), ...]}, best first, for every
+    verified dovetail overlap where read b starts at reads[a][offset] and its
+    first b_overlap bases align to the end of read a with `errors` edits.
+    Reads found to lie inside another read get no edges.
+    """
+    a_ids, b_ids, shared, diags = candidate_pairs(reads, k, w, min_shared)
+    candidates = defaultdict(list)
+    contained = set()
+
+    def width(length):
+        return band if band is not None else max(4, int(length * max_error))
+
+    for a, b, n, d in zip(a_ids.tolist(), b_ids.tolist(), shared.tolist(), diags.tolist()):
+        olap = len(reads[a]) - d
+        if olap < min_olap:
+            continue
+        if len(reads[b]) > olap:
+            candidates[a].append((d, -n, b))
+        elif b not in contained:
+            # a read lying inside another adds nothing to a layout and only steals its edges
+            errors, _ = overlap_distance(reads[b], reads[a][d:], width(len(reads[b])))
+            if errors <= max_error * len(reads[b]):
+                contained.add(b)
+    graph = {}
+    for a, options in candidates.items():
+        if a in contained:
+            continue
+        options = sorted(o for o in options if o[2] not in contained)
+        edges = []
+        for d, _, b in options[:max_candidates]:
+            a_end = reads[a][d:]
+            errors, b_overlap = overlap_distance(a_end, reads[b], width(len(a_end)))
+            if errors <= max_error * len(a_end) and b_overlap >= min_olap:
+                edges.append((b, d, b_overlap, errors))
+        if edges:
+            edges.sort(key=lambda e: (e[3] / max(len(reads[a]) - e[1], 1), e[1]))
+            graph[a] = edges
+    return graph
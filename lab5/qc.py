@@ -0,0 +1,208 @@
+"""Assembly QC for lab5: comparing a reconstruction with the reference.
+
+Containment and the longest exact dovetail overlaps come from two Z-function
+passes, each linear in the combined length. Identity comes from the global edit
+distance over what is left once the common prefix and suffix are stripped:
+exact, with the bit-parallel overlap.edit_distance, up to BIT_PARALLEL_MAX
+bases, and above that from a banded alignment computed row by row with NumPy,
+the band covering the length difference plus some slack. Contig statistics
+(count, N50, L50) are computed from the contig lengths alone.
+"""
+import json
+import time
+
+import numpy as np
+
+from overlap import edit_distance
+
+SEPARATOR = '\x00'
+BAND_SLACK = 32
+# above this the O(n*m/word) bit-parallel pass loses to the O(n*band) banded one
+BIT_PARALLEL_MAX = 100_000
+
+
+def z_function(s):
+    """z[i] = length of the longest common prefix of s and s[i:] (z[0] = len(s))"""
+    n = len(s)
+    z = [0] * n
+    if n:
+        z[0] = n
+    left = right = 0
+    for i in range(1, n):
+        if i < right:
+            z[i] = min(right - i, z[i - left])
+        while i + z[i] < n and s[z[i]] == s[i + z[i]]:
+            z[i] += 1
+        if i + z[i] > right:
+            left, right = i, i + z[i]
+    return z
+
+
+def _match_ends(pattern, text):
+    """(first offset of pattern in text or -1, longest suffix of text that is a prefix of pattern)"""
+    if not pattern:
+        return 0, 0
+    z = z_function(pattern + SEPARATOR + text)
+    base = len(pattern) + 1
+    found = -1
+    overlap = 0
+    for i in range(base, len(z)):
+        if z[i] == len(pattern) and found < 0:
+            found = i - base
+        if i + z[i] == len(z) and not overlap:
+            overlap = z[i]
+    return found, overlap
+
+
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    if not n:
+        return 0
+    x = np.frombuffer(a[:n].encode('ascii', errors='replace'), dtype=np.uint8)
+    y = np.frombuffer(b[:n].encode('ascii', errors='replace'), dtype=np.uint8)
+    diff = np.flatnonzero(x != y)
+    return int(diff[0]) if len(diff) else n
+
+
+def exact_matches(reference, recon):
+    """Containment and longest exact overlaps between reference and reconstruction"""
+    ref_at, recon_then_ref = _match_ends(reference, recon)
+    recon_at, ref_then_recon = _match_ends(recon, reference)
+    if not recon:
+        recon_at = -1
+    return {
+        'recon_contains_reference': ref_at >= 0,
+        'reference_offset_in_recon': ref_at,
+        'reference_contains_recon': recon_at >= 0,
+        'recon_offset_in_reference': recon_at,
+        # suffix of the first equal to a prefix of the second
+        'overlap_recon_reference': recon_then_ref,
+        'overlap_reference_recon': ref_then_recon,
+        'common_prefix': _common_prefix(reference, recon),
+        'common_suffix': _common_prefix(reference[::-1], recon[::-1]),
+    }
+
+
+def banded_edit_distance(a, b, band=None):
+    """Global edit distance of a and b, restricted to diagonals within band of the corner path
+
+    The band always covers the length difference, plus BAND_SLACK diagonals
+    (or `band`) on either side. A result larger than the band is an upper bound.
+    """
+    n, m = len(a), len(b)
+    if band is None:
+        band = BAND_SLACK
+    lo = min(0, m - n) - band
+    hi = max(0, m - n) + band
+    diags = np.arange(lo, hi + 1)
+    big = np.int64(n + m + 1)
+    x = np.frombuffer(a.encode('ascii', errors='replace'), dtype=np.uint8)
+    y = np.frombuffer(b.encode('ascii', errors='replace'), dtype=np.uint8)
+    # row 0: D[0][j] = j
+    row = np.where((diags >= 0) & (diags <= m), diags, big).astype(np.int64)
+    for i in range(1, n + 1):
+        j = i + diags
+        inside = (j >= 0) & (j <= m)
+        if m:
+            cost = (y[np.clip(j - 1, 0, m - 1)] != x[i - 1]).astype(np.int64)
+        else:
+            cost = np.ones(len(diags), dtype=np.int64)
+        diag = row + np.where(j >= 1, cost, big)
+        up = np.empty_like(row)
+        up[:-1] = row[1:] + 1
+        up[-1] = big
+        best = np.minimum(diag, up)
+        best[j == 0] = i
+        best = np.where(inside, best, big)
+        # left moves: D[i][j] = min over k <= j of best[k] + (j - k)
+        row = np.minimum.accumulate(best - diags) + diags
+        row = np.where(inside, np.minimum(row, big), big)
+    return int(row[m - n - lo])
+
+
+def identity(reference, recon, band=None):
+    """(edit distance, 1 - distance / longer length) of a global alignment
+
+    An explicit band forces the banded alignment.
+    """
+    longest = max(len(reference), len(recon))
+    if not longest:
+        return 0, 1.0
+    # an exact common prefix or suffix never changes the edit distance, and is
+    # usually most of a good reconstruction
+    head = _common_prefix(reference, recon)
+    short = min(len(reference), len(recon)) - head
+    tail = min(_common_prefix(reference[::-1], recon[::-1]), short)
+    a = reference[head:len(reference) - tail]
+    b = recon[head:len(recon) - tail]
+    if band is None and min(len(a), len(b)) <= BIT_PARALLEL_MAX:
+        if len(a) > len(b):
+            a, b = b, a
+        dist = edit_distance(a, b)
+    else:
+        dist = banded_edit_distance(a, b, band)
+    return dist, 1 - dist / longest
+
+
+def contig_stats(contigs):
+    """Count, total length, largest contig, N50 and L50 of a list of contig sequences or lengths"""
+    lengths = sorted((c if isinstance(c, int) else len(c) for c in contigs), reverse=True)
+    total = sum(lengths)
+    n50 = l50 = 0
+    running = 0
+    for i, length in enumerate(lengths, 1):
+        running += length
+        if running * 2 >= total:
+            n50, l50 = length, i
+            break
+    return {'contigs': len(lengths), 'total_length': total,
+            'largest': lengths[0] if lengths else 0, 'n50': n50, 'l50': l50}
+
+
+def assembly_qc(reference, recon, contigs=None, band=None):
+    """All QC metrics for a reconstruction; contigs defaults to [recon]"""
+    report = {'reference_length': len(reference), 'recon_length': len(recon)}
+    report.update(contig_stats(contigs if contigs is not None else ([recon] if recon else [])))
+    report.update(exact_matches(reference, recon))
+    if report['recon_contains_reference'] or report['reference_contains_recon']:
+        # one is a substring of the other: the distance is just the flanks
+        dist = abs(len(reference) - len(recon))
+        report['edit_distance'] = dist
+        report['identity'] = 1 - dist / max(len(reference), len(recon), 1)
+    else:
+        report['edit_distance'], report['identity'] = identity(reference, recon, band)
+    return report
+
+
+class StageTimer:
+    """Wall-clock time per named stage, usable as `with timer.stage('name'):`"""
+
+    def __init__(self):
+        self.timings = {}
+        self._start = time.perf_counter()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def total(self):
+        return time.perf_counter() - self._start
+
+
+class _Stage:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timings = self.timer.timings
+        timings[self.name] = timings.get(self.name, 0.0) + time.perf_counter() - self.t0
+
+
+def write_report(path, report):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,251 @@
+"""Restriction digests for the lab6 gel simulation.
+
+All recognition sites of an enzyme panel, IUPAC codes expanded and both
+strands included, go into a single Aho-Corasick automaton. A sequence is then
+scanned once whatever the size of the panel. The automaton state carries over
+from one chunk to the next, so long genomes can be streamed without overlap
+bookkeeping. Cut positions are on the top strand, in 0-based coordinates
+("the enzyme cuts before base p"). Fragment lengths for any single, double or
+larger digest come from the union of the enzymes' cut positions.
+"""
+import itertools
+from collections import deque
+
+IUPAC = {
+    'A': 'A', 'C': 'C', 'G': 'G', 'T': 'T',
+    'R': 'AG', 'Y': 'CT', 'S': 'CG', 'W': 'AT', 'K': 'GT', 'M': 'AC',
+    'B': 'CGT', 'D': 'AGT', 'H': 'ACT', 'V': 'ACG', 'N': 'ACGT',
+}
+IUPAC_COMPLEMENT = str.maketrans('ACGTRYSWKMBDHVN', 'TGCAYRSWMKVHDBN')
+MAX_EXPANSION = 1 << 16
+CHUNK = 1 << 20
+
+# Recognition site with the top-strand cut marked by '^'
+COMMON_ENZYMES = {
+    'EcoRI': 'G^AATTC',
+    'BamHI': 'G^GATCC',
+    'HindIII': 'A^AGCTT',
+    'PstI': 'CTGCA^G',
+    'SalI': 'G^TCGAC',
+    'XbaI': 'T^CTAGA',
+    'XhoI': 'C^TCGAG',
+    'SmaI': 'CCC^GGG',
+    'KpnI': 'GGTAC^C',
+    'SacI': 'GAGCT^C',
+    'NotI': 'GC^GGCCGC',
+    'NcoI': 'C^CATGG',
+    'NdeI': 'CA^TATG',
+    'EcoRV': 'GAT^ATC',
+    'AluI': 'AG^CT',
+    'HaeIII': 'GG^CC',
+    'MspI': 'C^CGG',
+    'TaqI': 'T^CGA',
+    'Sau3AI': '^GATC',
+    'RsaI': 'GT^AC',
+    'HinfI': 'G^ANTC',
+    'AvaI': 'C^YCGRG',
+    'HincII': 'GTY^RAC',
+    'BglI': 'GCCNNNN^NGGC',
+    'XmnI': 'GAANN^NNTTC',
+}
+# byte -> 0..3 for ACGT (either case), 4 for anything else
+_CODE_TABLE = bytes('ACGT'.index(chr(c).upper()) if chr(c) in 'ACGTacgt' else 4 for c in range(256))
+
+
+def parse_site(site):
+    """(recognition sequence, top-strand cut offset) from e.g. 'G^AATTC'"""
+    site = site.strip().upper()
+    cut = site.find('^')
+    bases = site.replace('^', '')
+    if not bases or any(b not in IUPAC for b in bases):
+        raise ValueError(f"invalid recognition site {site!r}")
+    return bases, (cut if cut >= 0 else len(bases))
+
+
+def expand_iupac(site):
+    """All concrete ACGT sequences matched by an IUPAC site"""
+    total = 1
+    for b in site:
+        total *= len(IUPAC[b])
+    if total > MAX_EXPANSION:
+        raise ValueError(f"site {site} expands to {total} sequences (limit {MAX_EXPANSION})")
+    return [''.join(p) for p in itertools.product(*(IUPAC[b] for b in site))]
+
+
+def reverse_complement_site(site):
+    return site.translate(IUPAC_COMPLEMENT)[::-1]
+
+
+def load_enzymes(path):
+    """{name: site} from a text file of 'Name  SITE' lines, '#' starts a comment"""
+    enzymes = {}
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            if len(parts) != 2:
+                raise ValueError(f"{path}: expected 'name site', got {line!r}")
+            enzymes[parts[0]] = parts[1]
+    return enzymes
+
+
+class EnzymePanel:
+    """Aho-Corasick automaton over every recognition site of a set of enzymes
+
+    enzymes is a {name: site} dict (see COMMON_ENZYMES) or an iterable of
+    names from COMMON_ENZYMES.
+    """
+
+    def __init__(self, enzymes=None):
+        if enzymes is None:
+            enzymes = COMMON_ENZYMES
+        elif not isinstance(enzymes, dict):
+            enzymes = {name: COMMON_ENZYMES[name] for name in enzymes}
+        self.names = list(enzymes)
+        self.sites = {}
+        patterns = {}
+        for idx, name in enumerate(self.names):
+            site, cut = parse_site(enzymes[name])
+            self.sites[name] = (site, cut)
+            length = len(site)
+            # (enzyme, offset of the top-strand cut from the match start)
+            strands = [(site, cut)]
+            rc = reverse_complement_site(site)
+            if rc != site:
+                strands.append((rc, length - cut))
+            for pattern_site, offset in strands:
+                for pattern in expand_iupac(pattern_site):
+                    patterns.setdefault(pattern, set()).add((idx, offset))
+        self.max_len = max((len(p) for p in patterns), default=0)
+        self._build(patterns)
+
+    def _build(self, patterns):
+        goto = [{}]
+        out = [set()]
+        for pattern, hits in patterns.items():
+            state = 0
+            for base in pattern:
+                code = 'ACGT'.index(base)
+                nxt = goto[state].get(code)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][code] = nxt
+                    goto.append({})
+                    out.append(set())
+                state = nxt
+            out[state] |= {(idx, offset - len(pattern)) for idx, offset in hits}
+        # breadth-first pass turns the trie into a full DFA over A, C, G, T and "other"
+        delta = [0] * (5 * len(goto))
+        fail = [0] * len(goto)
+        queue = deque()
+        for code in range(4):
+            nxt = goto[0].get(code, 0)
+            delta[code] = nxt
+            if nxt:
+                queue.append(nxt)
+        while queue:
+            state = queue.popleft()
+            out[state] |= out[fail[state]]
+            for code in range(4):
+                nxt = goto[state].get(code)
+                if nxt is None:
+                    delta[5 * state + code] = delta[5 * fail[state] + code]
+                else:
+                    fail[nxt] = delta[5 * fail[state] + code]
+                    delta[5 * state + code] = nxt
+                    queue.append(nxt)
+        self._delta = delta
+        # hits stored as (enzyme, cut relative to the base after the match end)
+        self._out = [tuple(sorted(o)) if o else None for o in out]
+        self.states = len(goto)
+
+    def scan(self, chunk, start=0, state=0, cuts=None):
+        """Feed one chunk at global position start; returns (state, cuts)
+
+        cuts is a list of sets of cut positions, one per enzyme. Positions may
+        fall outside the sequence and are clipped by the caller.
+        """
+        if cuts is None:
+            cuts = [set() for _ in self.names]
+        if isinstance(chunk, str):
+            chunk = chunk.encode('ascii')
+        codes = chunk.translate(_CODE_TABLE)
+        delta = self._delta
+        out = self._out
+        pos = start + 1
+        for code in codes:
+            state = delta[5 * state + code]
+            hits = out[state]
+            if hits is not None:
+                for idx, rel in hits:
+                    cuts[idx].add(pos + rel)
+            pos += 1
+        return state, cuts
+
+    def find_cuts(self, seq, circular=False, chunk_size=CHUNK):
+        """({name: sorted cut positions}, length) for a sequence or an iterable of chunks
+
+        For circular molecules, sites spanning the origin are found as well and
+        positions are taken modulo the length.
+        """
+        chunks = [seq] if isinstance(seq, (str, bytes)) else seq
+        state = 0
+        cuts = None
+        length = 0
+        head = ''
+        for chunk in chunks:
+            if isinstance(chunk, bytes):
+                chunk = chunk.decode('ascii')
+            for i in range(0, len(chunk), chunk_size):
+                piece = chunk[i:i + chunk_size]
+                if circular and len(head) < self.max_len:
+                    head += piece[:self.max_len - len(head)]
+                state, cuts = self.scan(piece, length, state, cuts)
+                length += len(piece)
+        if cuts is None:
+            cuts = [set() for _ in self.names]
+        if circular and length:
+            self.scan(head[:self.max_len - 1], length, state, cuts)
+            return {name: sorted({c % length for c in cuts[i]}) for i, name in enumerate(self.names)}, length
+        return {name: sorted(c for c in cuts[i] if 0 < c < length) for i, name in enumerate(self.names)}, length
+
+
+def fragment_lengths(cuts, length, circular=False):
+    """Fragment lengths, in sequence order, after cutting at the given positions"""
+    cuts = sorted(set(cuts))
+    if not cuts:
+        return [length] if length else []
+    if circular:
+        return [b - a for a, b in zip(cuts, cuts[1:])] + [length - cuts[-1] + cuts[0]]
+    bounds = [0] + cuts + [length]
+    return [b - a for a, b in zip(bounds, bounds[1:])]
+
+
+def digest(cut_sites, length, enzymes, circular=False):
+    """Fragment lengths of a digest with one or more enzymes, from find_cuts output"""
+    cuts = set()
+    for name in enzymes:
+        cuts.update(cut_sites[name])
+    return fragment_lengths(cuts, length, circular)
+
+
+def digest_all(cut_sites, length, names=None, double=True, circular=False):
+    """{(enzyme,) or (enzyme, enzyme): fragment lengths} for every single and double digest"""
+    names = list(cut_sites) if names is None else list(names)
+    combos = [(name,) for name in names]
+    if double:
+        combos += list(itertools.combinations(names, 2))
+    return {combo: digest(cut_sites, length, combo, circular) for combo in combos}
+
+
+def digest_sequences(records, panel, digests, circular=False):
+    """Yield (header, length, {digest: fragment lengths}) for (header, sequence) records
+
+    digests is a list of enzyme-name tuples; the panel is built once and each
+    record is scanned once.
+    """
+    for header, seq in records:
+        cut_sites, length = panel.find_cuts(seq, circular)
+        yield header, length, {combo: digest(cut_sites, length, combo, circular) for combo in digests}
@@ -1,60 +1,13 @@
+import argparse
+import os
+import sys
 import random
 import math
-import json
-from urllib import request, parse
-from contextlib import closing
 
-def fetch_ncbi_sequence(min_len=1000, max_len=3000, retmax=100, api_key=None, seed=None):
-    if seed is not None:
-        random.seed(seed)
-    try:
-        term = f'{min_len}:{max_len}[SLEN] AND biomol_genomic[PROP] NOT mitochondrial[Title] NOT chloroplast[Title]'
-        params = {
-            'db': 'nuccore',
-            'term': term,
-            'retmode': 'json',
-            'retmax': str(retmax),
-        }
-        if api_key:
-            params['api_key'] = api_key
-        url = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi?' + parse.urlencode(params)
-        with closing(request.urlopen(url, timeout=10)) as resp:
-            data = json.load(resp)
-        ids = data.get('esearchresult', {}).get('idlist', [])
-        if not ids:
-            raise RuntimeError('No IDs returned from NCBI search.')
-        picked = random.choice(ids)
-        params = {
-            'db': 'nuccore',
-            'id': picked,
-            'rettype': 'fasta',
-            'retmode': 'text',
-        }
-        if api_key:
-            params['api_key'] = api_key
-        url = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?' + parse.urlencode(params)
-        with closing(request.urlopen(url, timeout=10)) as resp:
-            fasta = resp.read().decode('utf-8', errors='ignore')
-        header, seq = parse_fasta(fasta)
-        if not seq or not (min_len <= len(seq) <= max_len):
-            raise RuntimeError('Fetched sequence outside desired length or empty.')
-        return {'accession': header, 'sequence': seq}
-    except Exception:
-        L = random.randint(min_len, max_len)
-        seq = random_dna(L)
-        return {'accession': 'SYNTHETIC_RANDOM_SEQ', 'sequence': seq}
-
-def parse_fasta(fasta_text):
-    lines = [l.strip() for l in fasta_text.splitlines() if l.strip()]
-    if not lines or not lines[0].startswith('>'):
-        return ('UNKNOWN', '')
-    header = lines[0][1:]
-    seq = ''.join(lines[1:]).upper()
-    seq = ''.join(c for c in seq if c in 'ACGTN')
-    return (header, seq)
-
-def random_dna(length):
-    return ''.join(random.choice('ACGT') for _ in range(length))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.ncbi import fetch_ncbi_sequence
+from digest import COMMON_ENZYMES, EnzymePanel, digest, load_enzymes
+from gel import render_gel
 
 def sample_fragments(seq, n=10, min_len=100, max_len=300, seed=None):
     if seed is not None:
@@ -84,63 +37,50 @@ def migrate_position(bp, min_bp, max_bp, height):
     return max(0, min(height - 1, y))
 
 def ascii_gel(fragment_lengths, ladder_bp=None, gel_height=40, lane_width=7, smear=False, seed=None):
-    if seed is not None:
-        random.seed(seed)
-    if ladder_bp is None:
-        ladder_bp = [100, 200, 300, 400, 500, 700, 1000, 1500, 2000, 2500, 3000]
-    all_bp = ladder_bp + fragment_lengths
-    min_bp = max(50, min(all_bp))
-    max_bp = max(all_bp)
-    lanes = 1 + len(fragment_lengths)
-    pad = 2
-    width = pad * 2 + lanes * lane_width
-    height = gel_height
-    grid = [[' ' for _ in range(width)] for _ in range(height)]
-    for lane in range(lanes):
-        cx = pad + lane * lane_width + lane_width // 2
-        for dx in range(-lane_width // 2 + 1, lane_width // 2):
-            x = cx + dx
-            if 0 <= x < width:
-                grid[0][x] = '-'
-    def draw_band(bp, lane_idx, char='='):
-        cx = pad + lane_idx * lane_width + lane_width // 2
-        y = migrate_position(bp, min_bp, max_bp, height)
-        smear_span = 0
-        if smear:
-            smear_span = random.randint(0, 1)
-        for dy in range(-smear_span, smear_span + 1):
-            yy = y + dy
-            if 0 <= yy < height:
-                for dx in range(-2, 3):
-                    x = cx + dx
-                    if 0 <= x < width:
-                        grid[yy][x] = char
-    for bp in ladder_bp:
-        if min_bp <= bp <= max_bp:
-            draw_band(bp, 0, char='#')
-    for i, bp in enumerate(fragment_lengths, start=1):
-        draw_band(bp, i, char='=')
-    lines = [''.join(row) for row in grid]
-    return '\n'.join(lines)
+    gel = render_gel(fragment_lengths, ladder_bp, gel_height, lane_width, smear, seed)
+    return gel.to_ascii()
+
+def parse_digests(spec):
+    """'EcoRI,HindIII,EcoRI+HindIII' -> [('EcoRI',), ('HindIII',), ('EcoRI', 'HindIII')]"""
+    return [tuple(part.split('+')) for part in spec.split(',') if part]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Restriction digest of an NCBI sequence on a simulated gel.")
+    parser.add_argument("--digests", default="EcoRI,HindIII,AluI,HaeIII,MspI,EcoRI+HindIII,AluI+HaeIII",
+                        help="comma-separated lanes; join enzymes with '+' for a multiple digest")
+    parser.add_argument("--enzymes", help="enzyme file of 'name site' lines (default: built-in panel)")
+    parser.add_argument("--circular", action="store_true", help="treat the sequence as circular")
+    parser.add_argument("--png", help="also save the gel as an image")
+    args = parser.parse_args(argv)
+
+    enzymes = load_enzymes(args.enzymes) if args.enzymes else COMMON_ENZYMES
+    digests = parse_digests(args.digests)
+    unknown = sorted({name for combo in digests for name in combo} - set(enzymes))
+    if unknown:
+        parser.error(f"unknown enzyme(s): {', '.join(unknown)}")
+    panel = EnzymePanel({name: enzymes[name] for combo in digests for name in combo})
 
-def main():
     seq_info = fetch_ncbi_sequence(min_len=1000, max_len=3000, seed=42)
     seq = seq_info['sequence']
-    fragments = sample_fragments(seq, n=10, min_len=100, max_len=300, seed=42)
-    samples = fragments
-    frag_lengths = [f['length'] for f in samples]
-    gel = ascii_gel(frag_lengths, gel_height=40, lane_width=7, smear=False, seed=42)
+    cut_sites, length = panel.find_cuts(seq, circular=args.circular)
+    lanes = [digest(cut_sites, length, combo, args.circular) for combo in digests]
+    gel = render_gel(lanes, gel_height=40, lane_width=7, smear=False, seed=42)
     print(f"Sequence: {seq_info['accession']}")
     print(f"Sequence length: {len(seq)} bp")
-    print("Sample fragments (lane -> length bp):")
-    for i, f in enumerate(samples, start=1):
-        print(f"  Lane {i}: {f['length']} bp (start {f['start']})")
-    print("\nASCII gel (Lane 0 = Ladder, Lanes 1-10 = Samples):\n")
-    print(gel)
+    print("Digests (lane -> fragment lengths bp):")
+    for i, (combo, frags) in enumerate(zip(digests, lanes), start=1):
+        cuts = sorted({c for name in combo for c in cut_sites[name]})
+        print(f"  Lane {i}: {'+'.join(combo)}: {', '.join(map(str, sorted(frags, reverse=True)))} "
+              f"({len(cuts)} cut{'s' if len(cuts) != 1 else ''})")
+    print(f"\nASCII gel (Lane 0 = Ladder, Lanes 1-{len(lanes)} = Digests):\n")
+    print(gel.to_ascii())
     print("\nLegend:")
-    print("  = : sample fragment bands")
+    print("  = : digest fragment bands")
     print("  # : ladder bands")
     print("  - : wells at top")
+    if args.png:
+        gel.to_png(args.png)
+        print(f"\nGel image saved as '{args.png}'")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
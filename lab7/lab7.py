@@ -1,81 +1,111 @@
-from collections import defaultdict
-import random
-import json
-from urllib import request, parse
-from contextlib import closing
+import os
+import sys
+from collections import defaultdict, Counter
+import heapq
+import numpy as np
 
-def fetch_ncbi_sequence(min_len=1000, max_len=3000, retmax=100, api_key=None, seed=None):
-    if seed is not None:
-        random.seed(seed)
-    try:
-        term = f'{min_len}:{max_len}[SLEN] AND biomol_genomic[PROP] NOT mitochondrial[Title] NOT chloroplast[Title]'
-        params = {
-            'db': 'nuccore',
-            'term': term,
-            'retmode': 'json',
-            'retmax': str(retmax),
-        }
-        if api_key:
-            params['api_key'] = api_key
-        url = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi?' + parse.urlencode(params)
-        with closing(request.urlopen(url, timeout=10)) as resp:
-            data = json.load(resp)
-        ids = data.get('esearchresult', {}).get('idlist', [])
-        if not ids:
-            raise RuntimeError('No IDs returned from NCBI search.')
-        picked = random.choice(ids)
-        params = {
-            'db': 'nuccore',
-            'id': picked,
-            'rettype': 'fasta',
-            'retmode': 'text',
-        }
-        if api_key:
-            params['api_key'] = api_key
-        url = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?' + parse.urlencode(params)
-        with closing(request.urlopen(url, timeout=10)) as resp:
-            fasta = resp.read().decode('utf-8', errors='ignore')
-        header, seq = parse_fasta(fasta)
-        if not seq or not (min_len <= len(seq) <= max_len):
-            raise RuntimeError('Fetched sequence outside desired length or empty.')
-        return {'accession': header, 'sequence': seq}
-    except Exception as e:
-        print(f"Error fetching from NCBI: {e}")
-        print("Falling back to synthetic random sequence...")
-        L = random.randint(min_len, max_len)
-        seq = random_dna(L)
-        return {'accession': 'SYNTHETIC_RANDOM_SEQ', 'sequence': seq}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.ncbi import fetch_ncbi_sequence
+from common.kmers import MAX_K, base_codes, decode_kmer, encode_kmers, group_kmers
+from tandem import find_tandem_repeats
 
-def parse_fasta(fasta_text):
-    lines = [l.strip() for l in fasta_text.splitlines() if l.strip()]
-    if not lines or not lines[0].startswith('>'):
-        return ('UNKNOWN', '')
-    header = lines[0][1:]
-    seq = ''.join(lines[1:]).upper()
-    seq = ''.join(c for c in seq if c in 'ACGTN')
-    return (header, seq)
+def _window(dna_sequence, i, length):
+    # always a str, also for a PackedSeq (whose slices are PackedSeq views)
+    return str(dna_sequence[i:i + length])
 
-def random_dna(length):
-    return ''.join(random.choice('ACGT') for _ in range(length))
+def kmer_positions(dna_sequence, pattern_length, min_repetitions=1, codes=None):
+    """(pattern, positions) for every k-mer seen min_repetitions times, in order of first occurrence
+
+    dna_sequence may be a str or a PackedSeq; patterns are always str.
+    """
+    if pattern_length > MAX_K:
+        dna_sequence = str(dna_sequence)
+        index = defaultdict(list)
+        for i in range(len(dna_sequence) - pattern_length + 1):
+            index[dna_sequence[i:i + pattern_length]].append(i)
+        return [(p, pos) for p, pos in index.items() if len(pos) >= min_repetitions]
+    if codes is None:
+        codes = base_codes(dna_sequence)
+    kmers, valid = encode_kmers(codes, pattern_length)
+    keys, first, positions, starts, counts = group_kmers(kmers, valid, min_repetitions)
+    groups = []
+    for code, pos, start, count in zip(keys.tolist(), first.tolist(), starts.tolist(), counts.tolist()):
+        groups.append((pos, code, positions[start:start + count]))
+    # windows holding anything other than ACGT are rare, index them as plain strings
+    other = defaultdict(list)
+    for i in np.flatnonzero(~valid).tolist():
+        other[_window(dna_sequence, i, pattern_length)].append(i)
+    for pattern, pos in other.items():
+        if len(pos) >= min_repetitions:
+            groups.append((pos[0], pattern, pos))
+    groups.sort(key=lambda g: g[0])
+    return [(decode_kmer(code, pattern_length) if isinstance(code, int) else code,
+             pos if isinstance(pos, list) else pos.tolist()) for _, code, pos in groups]
 
 def find_repetitive_sequences(dna_sequence, min_length=3, max_length=6, min_repetitions=2):
     repetitive_sequences = defaultdict(list)
+    codes = base_codes(dna_sequence)
     
     for pattern_length in range(min_length, max_length + 1):
-        for i in range(len(dna_sequence) - pattern_length + 1):
-            pattern = dna_sequence[i:i + pattern_length]
-            
-            positions = []
-            for j in range(len(dna_sequence) - pattern_length + 1):
-                if dna_sequence[j:j + pattern_length] == pattern:
-                    positions.append(j)
-            
-            if len(positions) >= min_repetitions:
-                if pattern not in repetitive_sequences:
-                    repetitive_sequences[pattern] = positions
+        for pattern, positions in kmer_positions(dna_sequence, pattern_length, min_repetitions, codes):
+            if pattern not in repetitive_sequences:
+                repetitive_sequences[pattern] = positions
     
     return repetitive_sequences
 
+def _offer(best, item, top_n):
+    if len(best) < top_n:
+        heapq.heappush(best, item)
+    elif item > best[0]:
+        heapq.heapreplace(best, item)
+
+def top_repetitive_sequences(dna_sequence, top_n=20, min_length=3, max_length=6, min_repetitions=2):
+    """The top_n patterns as ranked by display_results, without keeping every position list
+
+    Only occurrence counts are kept while ranking; positions are collected
+    afterwards for the winners alone.
+    """
+    codes = base_codes(dna_sequence)
+    best = []
+    for pattern_length in range(min_length, max_length + 1):
+        other = Counter()
+        other_first = {}
+        if pattern_length <= MAX_K:
+            kmers, valid = encode_kmers(codes, pattern_length)
+            keys, first, counts = np.unique(kmers[valid], return_index=True, return_counts=True)
+            first = np.flatnonzero(valid)[first]
+            keep = counts >= min_repetitions
+            if len(best) == top_n:
+                keep &= counts >= best[0][0]
+            for code, pos, count in zip(keys[keep].tolist(), first[keep].tolist(), counts[keep].tolist()):
+                _offer(best, (count, pattern_length, -pos, code), top_n)
+            other_windows = np.flatnonzero(~valid).tolist()
+        else:
+            other_windows = range(len(dna_sequence) - pattern_length + 1)
+        for i in other_windows:
+            pattern = _window(dna_sequence, i, pattern_length)
+            other[pattern] += 1
+            other_first.setdefault(pattern, i)
+        for pattern, count in other.items():
+            if count >= min_repetitions:
+                _offer(best, (count, pattern_length, -other_first[pattern], pattern), top_n)
+    
+    results = []
+    encoded = {}
+    for count, pattern_length, _, code in sorted(best, reverse=True):
+        if isinstance(code, int):
+            if pattern_length not in encoded:
+                encoded[pattern_length] = encode_kmers(codes, pattern_length)
+            kmers, valid = encoded[pattern_length]
+            positions = np.flatnonzero(valid & (kmers == np.uint64(code))).tolist()
+            pattern = decode_kmer(code, pattern_length)
+        else:
+            pattern = code
+            text = str(dna_sequence)
+            positions = [i for i in range(len(text) - pattern_length + 1) if text.startswith(pattern, i)]
+        results.append((pattern, positions))
+    return results
+
 def display_results(dna_sequence, repetitive_sequences):
     print(f"\nDNA Sequence Length: {len(dna_sequence)} nucleotides\n")
     print(f"Found {len(repetitive_sequences)} repetitive sequences:\n")
@@ -112,3 +142,8 @@ if __name__ == "__main__":
     display_results(DNA_SEQUENCE, results)
     
     print(f"\nTotal unique repetitive patterns found: {len(results)}")
+    
+    tandem = list(find_tandem_repeats(DNA_SEQUENCE, max_period=10, min_copies=3, min_length=12))
+    print(f"\nTandem repeats (period 1-10, >= 3 copies): {len(tandem)}")
+    for r in tandem[:20]:
+        print(f"  {r['start']}-{r['end']}: ({r['unit']})x{r['copies']:.1f} purity {r['purity']:.2f}")
@@ -1,111 +1,88 @@
-from collections import Counter
-import matplotlib.pyplot as plt
+import argparse
+import os
+import sys
 import random
-import json
-from urllib import request, parse
-from contextlib import closing
+import numpy as np
 
-def fetch_ncbi_sequence(min_len=1000, max_len=3000, retmax=100, api_key=None, seed=None):
-    if seed is not None:
-        random.seed(seed)
-    try:
-        term = f'{min_len}:{max_len}[SLEN] AND biomol_genomic[PROP] NOT mitochondrial[Title] NOT chloroplast[Title]'
-        params = {
-            'db': 'nuccore',
-            'term': term,
-            'retmode': 'json',
-            'retmax': str(retmax),
-        }
-        if api_key:
-            params['api_key'] = api_key
-        url = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi?' + parse.urlencode(params)
-        with closing(request.urlopen(url, timeout=10)) as resp:
-            data = json.load(resp)
-        ids = data.get('esearchresult', {}).get('idlist', [])
-        if not ids:
-            raise RuntimeError('No IDs returned from NCBI search.')
-        picked = random.choice(ids)
-        params = {
-            'db': 'nuccore',
-            'id': picked,
-            'rettype': 'fasta',
-            'retmode': 'text',
-        }
-        if api_key:
-            params['api_key'] = api_key
-        url = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?' + parse.urlencode(params)
-        with closing(request.urlopen(url, timeout=10)) as resp:
-            fasta = resp.read().decode('utf-8', errors='ignore')
-        header, seq = parse_fasta(fasta)
-        if not seq:
-            raise RuntimeError('Fetched sequence is empty.')
-        return {'accession': header, 'sequence': seq}
-    except Exception as e:
-        print(f"Error fetching from NCBI: {e}")
-        print("Falling back to synthetic random sequence...")
-        L = random.randint(min_len, max_len)
-        seq = random_dna(L)
-        return {'accession': 'SYNTHETIC_RANDOM_SEQ', 'sequence': seq}
-
-def parse_fasta(fasta_text):
-    lines = [l.strip() for l in fasta_text.splitlines() if l.strip()]
-    if not lines or not lines[0].startswith('>'):
-        return ('UNKNOWN', '')
-    header = lines[0][1:]
-    seq = ''.join(lines[1:]).upper()
-    seq = ''.join(c for c in seq if c in 'ACGTN')
-    return (header, seq)
-
-def random_dna(length):
-    return ''.join(random.choice('ACGT') for _ in range(length))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.ncbi import fetch_ncbi_sequences
+from common.synth import random_dna
+from common.plotting import bar_plot
+from common.kmers import base_codes, count_kmers, decode_kmer, encode_kmers, top_kmers
 
-def download_influenza_genomes(count=10):
+def download_influenza_genomes(count=10, api_key=None, client=None):
     """Download genome sequences from NCBI"""
-    sequences = []
     print(f"Fetching {count} genome sequences...")
+    try:
+        fetched = fetch_ncbi_sequences(count, min_len=1000, max_len=15000, retmax=100,
+                                       client=client, api_key=api_key)
+    except Exception as e:
+        print(f"Error fetching from NCBI: {e}")
+        fetched = []
+    if len(fetched) < count:
+        print(f"Only {len(fetched)} genomes fetched, filling the rest with synthetic random sequences...")
+    while len(fetched) < count:
+        fetched.append({'accession': 'SYNTHETIC_RANDOM_SEQ', 'sequence': random_dna(random.randint(1000, 15000))})
     
-    for i in range(count):
-        result = fetch_ncbi_sequence(min_len=1000, max_len=15000, retmax=100, seed=None)
+    sequences = []
+    for i, result in enumerate(fetched[:count]):
         sequences.append(result['sequence'])
         print(f"  Downloaded genome {i+1}/{count}: {result['accession'][:50]}...")
     
     return sequences
 
+def most_frequent_repeats(sequence, top=20, min_length=3, max_length=10):
+    """Most frequent substrings without N that occur more than once, as (substring, count)
+
+    Ordered by count, then shorter length, then earlier first occurrence.
+    """
+    codes = base_codes(sequence)
+    candidates = []
+    for length in range(min_length, max_length + 1):
+        kmers, valid = encode_kmers(codes, length)
+        keys, counts = count_kmers(kmers[valid], length)
+        keys, counts = top_kmers(keys, counts, top)
+        keep = counts > 1
+        keys, counts = keys[keep], counts[keep]
+        if not len(keys):
+            continue
+        hits = np.flatnonzero(valid & np.isin(kmers, keys))
+        hit_keys, first = np.unique(kmers[hits], return_index=True)
+        first_pos = dict(zip(hit_keys.tolist(), hits[first].tolist()))
+        for code, count in zip(keys.tolist(), counts.tolist()):
+            candidates.append((-count, length, first_pos[code], code))
+    candidates.sort()
+    return [(decode_kmer(code, length), -count) for count, length, _, code in candidates[:top]]
+
 def find_most_frequent_repeat(sequence, min_length=3, max_length=10):
     """Find the most frequent repeated substring in a sequence"""
-    repeat_counts = Counter()
-    
-    for length in range(min_length, max_length + 1):
-        for i in range(len(sequence) - length + 1):
-            substring = sequence[i:i+length]
-            if substring.count('N') == 0:  # Skip substrings with ambiguous bases
-                repeat_counts[substring] += 1
-    
-    # Get the most common repeat that appears more than once
-    most_common = [(seq, count) for seq, count in repeat_counts.most_common(20) if count > 1]
+    most_common = most_frequent_repeats(sequence, 1, min_length, max_length)
     return most_common[0] if most_common else (None, 0)
 
-# Download genomes
-print("Downloading influenza genomes...")
-genomes = download_influenza_genomes(10)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Most frequent short repeats in influenza genomes.")
+    parser.add_argument("-n", "--count", type=int, default=10, help="number of genomes (default: 10)")
+    parser.add_argument("-o", "--plot", default="most_frequent_repeats.png", help="output plot (.png or .svg)")
+    args = parser.parse_args(argv)
+
+    # Download genomes
+    print("Downloading influenza genomes...")
+    genomes = download_influenza_genomes(args.count)
 
-# Find most frequent repeats for each genome
-results = []
-for i, genome in enumerate(genomes):
-    repeat, count = find_most_frequent_repeat(genome)
-    results.append((i+1, repeat, count))
-    print(f"Genome {i+1}: Most frequent repeat '{repeat}' appears {count} times")
+    # Find most frequent repeats for each genome
+    results = []
+    for i, genome in enumerate(genomes):
+        repeat, count = find_most_frequent_repeat(genome)
+        results.append((i+1, repeat, count))
+        print(f"Genome {i+1}: Most frequent repeat '{repeat}' appears {count} times")
 
-# Plot the results
-genome_numbers = [r[0] for r in results]
-frequencies = [r[2] for r in results]
+    # Plot the results
+    genome_numbers = [r[0] for r in results]
+    frequencies = [r[2] for r in results]
+    bar_plot(args.plot, genome_numbers, frequencies, color='steelblue', edgecolor='black',
+             xlabel='Genome Number', ylabel='Frequency of Most Common Repeat',
+             title=f'Most Frequent Repetitions in {args.count} Influenza Genomes')
+    print(f"Plot saved as '{args.plot}'")
 
-plt.figure(figsize=(10, 6))
-plt.bar(genome_numbers, frequencies, color='steelblue', edgecolor='black')
-plt.xlabel('Genome Number')
-plt.ylabel('Frequency of Most Common Repeat')
-plt.title('Most Frequent Repetitions in 10 Influenza Genomes')
-plt.xticks(genome_numbers)
-plt.grid(axis='y', alpha=0.3)
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Tandem repeat (microsatellite) detection for lab7.
+
+For each period p the sequence is compared with itself shifted by p. In the
+resulting match array, a tandem repeat is a long run of matches. Runs of at
+least a seed length are found with NumPy. Neighbouring seeds are then merged
+across small gaps as long as the merged region stays above the purity
+threshold. Substitutions and short indels in a repeat therefore do not split
+it.
+
+A repeat is reported once, at its smallest period: matches inside a repeat
+already found at a period dividing p are masked before seeding at p, so
+(AT)n is not reported again at period 4, 6, ... and its harmonics do not get
+merged into a neighbouring repeat of the longer period.
+
+Input is consumed in chunks. Each buffer is cut at the last position no seed
+can still extend or merge across, and the rest is re-examined along with the
+next chunk, so the output is the same for any chunk size. Memory stays at a
+chunk plus the longest repeat whatever the genome size.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.fasta import FastaIndex
+from common.kmers import INVALID, base_codes
+
+CHUNK = 1 << 20
+MIN_SEED = 6
+_LETTERS = np.frombuffer(b'ACGTN', dtype=np.uint8)
+
+
+def _codes(chunk):
+    if isinstance(chunk, np.ndarray):
+        return chunk
+    if isinstance(chunk, (str, bytes)):
+        chunk = chunk.upper()
+    return base_codes(chunk)
+
+
+def max_gap(period):
+    """Longest run of mismatches merged over: one substitution or a short indel"""
+    return 2 * period + 1
+
+
+def _matches(codes, period, claimed=()):
+    """Positions i where base i equals base i + period, outside the (start, end) spans in claimed"""
+    match = (codes[:-period] == codes[period:]) & (codes[:-period] != INVALID)
+    for start, end in claimed:
+        match[start:max(start, end - period)] = False
+    return match
+
+
+def _seeds(match, period, min_seed=MIN_SEED):
+    """Starts and ends of the runs of matches long enough to seed a repeat"""
+    edges = np.diff(np.concatenate(([0], match.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = ends - starts >= max(min_seed, period)
+    return starts[keep], ends[keep]
+
+
+def _merge(match, starts, ends, period, min_purity):
+    starts, ends = starts.tolist(), ends.tolist()
+    if not starts:
+        return []
+    total = np.zeros(len(match) + 1, dtype=np.int64)
+    np.cumsum(match, out=total[1:])
+    gap = max_gap(period)
+    runs = []
+    s, e = starts[0], ends[0]
+    for ns, ne in zip(starts[1:], ends[1:]):
+        if ns - e <= gap and (total[ne] - total[s]) >= min_purity * (ne - s):
+            e = ne
+            continue
+        runs.append((s, e + period, int(total[e] - total[s])))
+        s, e = ns, ne
+    runs.append((s, e + period, int(total[e] - total[s])))
+    return runs
+
+
+def period_runs(codes, period, min_purity=0.85, min_seed=MIN_SEED, claimed=()):
+    """(start, end, matches) of tandem regions with this period, end exclusive
+
+    claimed holds (start, end) repeats of a period dividing this one; their
+    harmonics are not used as seeds.
+    """
+    if len(codes) <= period:
+        return []
+    match = _matches(codes, period, claimed)
+    starts, ends = _seeds(match, period, min_seed)
+    return _merge(match, starts, ends, period, min_purity)
+
+
+def _drop_harmonics(found):
+    """Drop repeats mostly covered by a repeat whose period divides theirs"""
+    by_period = {}
+    for r in found:
+        by_period.setdefault(r['period'], []).append(r)
+    bounds = {p: (np.array([r['start'] for r in rs]), np.array([r['end'] for r in rs]))
+              for p, rs in by_period.items()}
+    kept = []
+    for r in found:
+        s, e, p = r['start'], r['end'], r['period']
+        covered = False
+        for d in bounds:
+            if d >= p or p % d:
+                continue
+            starts, ends = bounds[d]
+            lo = np.searchsorted(ends, s, side='right')
+            hi = np.searchsorted(starts, e)
+            overlap = np.minimum(ends[lo:hi], e) - np.maximum(starts[lo:hi], s)
+            if overlap.sum() * 2 >= e - s:
+                covered = True
+                break
+        if not covered:
+            kept.append(r)
+    return kept
+
+
+def _scan(codes, min_period, max_period, min_copies, min_length, min_purity):
+    found = []
+    claimed = {}
+    seeds = {}
+    for period in range(min_period, max_period + 1):
+        if len(codes) <= period:
+            break
+        harmonics = [span for d, spans in claimed.items() if period % d == 0 for span in spans]
+        match = _matches(codes, period, harmonics)
+        starts, ends = _seeds(match, period)
+        mismatches = np.flatnonzero(~match)
+        seeds[period] = (starts, ends, int(mismatches[-1]) + 1 if len(mismatches) else 0)
+        for start, end, matches in _merge(match, starts, ends, period, min_purity):
+            length = end - start
+            purity = matches / (length - period)
+            if length < min_length or length / period < min_copies or purity < min_purity:
+                continue
+            claimed.setdefault(period, []).append((start, end))
+            found.append({
+                'start': start,
+                'end': end,
+                'period': period,
+                'copies': length / period,
+                'purity': purity,
+                'unit': _LETTERS[codes[start:start + period]].tobytes().decode('ascii'),
+            })
+    found = _drop_harmonics(found)
+    found.sort(key=lambda r: (r['start'], r['period']))
+    return found, seeds
+
+
+def scan_codes(codes, min_period=1, max_period=10, min_copies=3, min_length=12, min_purity=0.85):
+    """Tandem repeats in one array of base codes, sorted by start then period"""
+    return _scan(codes, min_period, max_period, min_copies, min_length, min_purity)[0]
+
+
+def _settled(seeds, length, max_period):
+    """Last position of a scanned buffer that no repeat can extend or merge across
+
+    At each period a seed blocks the positions after its start up to a merge gap
+    past its end, and the run of matches still open at the end of the buffer
+    may become a seed. Everything before an unblocked position is final, and
+    everything from it on is found again when scanned without what precedes it.
+    """
+    limit = min([length - max_period] + [trailing for _, _, trailing in seeds.values()])
+    if limit <= 0:
+        return 0
+    blocked = np.zeros(limit + 2, dtype=np.int64)
+    for period, (starts, ends, _) in seeds.items():
+        np.add.at(blocked, np.minimum(starts + 1, limit + 1), 1)
+        np.add.at(blocked, np.minimum(ends + max_gap(period) + 1, limit + 1), -1)
+    return int(np.flatnonzero(np.cumsum(blocked[:limit + 1]) == 0)[-1])
+
+
+def find_tandem_repeats(seq, min_period=1, max_period=10, min_copies=3, min_length=12,
+                        min_purity=0.85, chunk_size=CHUNK):
+    """Yield tandem repeats of a sequence or an iterable of chunks, in order of start
+
+    Each repeat is a dict with 0-based start, exclusive end, period, copies,
+    purity (fraction of bases matching the base one period earlier) and unit.
+    Chunks may be str, bytes, PackedSeq or base-code arrays.
+    """
+    if hasattr(seq, 'iter_codes'):
+        chunks = seq.iter_codes(chunk_size)
+    elif isinstance(seq, (str, bytes, np.ndarray)):
+        chunks = [seq]
+    else:
+        chunks = seq
+    buf = np.zeros(0, dtype=np.uint8)
+    offset = 0
+
+    def flush(buf, last):
+        found, seeds = _scan(buf, min_period, max_period, min_copies, min_length, min_purity)
+        cut = len(buf) if last else _settled(seeds, len(buf), max_period)
+        done = [r for r in found if r['start'] < cut]
+        for r in done:
+            r['start'] += offset
+            r['end'] += offset
+        return done, cut
+
+    for chunk in chunks:
+        codes = _codes(chunk)
+        for i in range(0, len(codes), chunk_size):
+            buf = np.concatenate((buf, codes[i:i + chunk_size]))
+            done, cut = flush(buf, False)
+            yield from done
+            buf = buf[cut:]
+            offset += cut
+    done, _ = flush(buf, True)
+    yield from done
+
+
+def fasta_chunks(index, name, chunk_size=CHUNK):
+    """Stream one record of a FastaIndex without loading it whole"""
+    length = index.length(name)
+    for start in range(0, length, chunk_size):
+        yield index.fetch(name, start, min(start + chunk_size, length))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find tandem repeats (microsatellites) in a FASTA file.")
+    parser.add_argument("fasta", help="input FASTA file (an .fai index is created next to it if missing)")
+    parser.add_argument("--min-period", type=int, default=1)
+    parser.add_argument("--max-period", type=int, default=10)
+    parser.add_argument("--min-copies", type=float, default=3)
+    parser.add_argument("--min-length", type=int, default=12)
+    parser.add_argument("--min-purity", type=float, default=0.85)
+    args = parser.parse_args(argv)
+    if not 1 <= args.min_period <= args.max_period:
+        parser.error("periods must satisfy 1 <= min-period <= max-period")
+
+    print("record\tstart\tend\tperiod\tcopies\tpurity\tunit")
+    with FastaIndex(args.fasta) as index:
+        for name in index.names:
+            repeats = find_tandem_repeats(fasta_chunks(index, name), args.min_period, args.max_period,
+                                          args.min_copies, args.min_length, args.min_purity)
+            for r in repeats:
+                print(f"{name}\t{r['start'] + 1}\t{r['end']}\t{r['period']}\t{r['copies']:.1f}\t"
+                      f"{r['purity']:.3f}\t{r['unit']}")
+
+
+if __name__ == "__main__":
+    main()
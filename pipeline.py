@@ -0,0 +1,262 @@
+"""Run the lab analyses over many FASTA files in one go.
+
+Every record of every input file is one task. Tasks run on a process pool,
+with only a bounded number of records in flight at a time, so memory does not
+grow with the number of files. Results are written as soon as each record
+finishes, so output order follows completion rather than input. TSV output
+is in long form (file, record, length, analysis, metric, value). JSONL output
+has one object per record. Progress and throughput go to stderr.
+
+    python pipeline.py 'genomes/**/*.fa' -a composition,tm,repeats -j 8 -o results.tsv
+    python pipeline.py genomes/ -a assembly --engine debruijn --coverage 20 -o assembly.jsonl
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common.fasta import clean_sequence, read_records
+from common.labs import add_lab_paths, load_lab5
+
+add_lab_paths()
+
+FASTA_SUFFIXES = ('.fa', '.fasta', '.fna', '.ffn', '.fas')
+ANALYSES = ('composition', 'tm', 'repeats', 'assembly')
+
+
+def expand_inputs(patterns):
+    """Sorted, de-duplicated FASTA paths from file names, globs and directories"""
+    paths = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if os.path.isdir(path):
+                for dirpath, _, files in os.walk(path):
+                    paths.update(os.path.join(dirpath, f) for f in files if f.lower().endswith(FASTA_SUFFIXES))
+            elif os.path.isfile(path):
+                paths.add(path)
+    return sorted(paths)
+
+
+def analyse_composition(seq, options):
+    from composition import composition_profile
+    profile = composition_profile(seq)
+    metrics = {'gc': profile['gc'], 'cpg_oe': profile['cpg_oe'], 'gc_skew': profile['gc_skew']}
+    metrics.update({f'pct_{nt}': pct for nt, pct in profile['mono'].items()})
+    return metrics
+
+
+def analyse_tm(seq, options):
+    from lab3ex2 import window_tm_profile
+    window = options['window']
+    _, tm1, tm2 = window_tm_profile(seq, window)[window]
+    metrics = {'window': window, 'windows': len(tm1)}
+    if len(tm1):
+        metrics.update({'tm1_mean': float(tm1.mean()), 'tm1_min': int(tm1.min()), 'tm1_max': int(tm1.max()),
+                        'tm2_mean': float(tm2.mean()), 'tm2_min': float(tm2.min()), 'tm2_max': float(tm2.max())})
+    return metrics
+
+
+def analyse_repeats(seq, options):
+    from lab7ex2 import most_frequent_repeats
+    from tandem import find_tandem_repeats
+    seq = seq.upper()
+    metrics = {}
+    for rank, (repeat, count) in enumerate(most_frequent_repeats(seq, options['top']), 1):
+        metrics[f'repeat_{rank}'] = repeat
+        metrics[f'repeat_{rank}_count'] = count
+    tandem = list(find_tandem_repeats(seq))
+    metrics['tandem_repeats'] = len(tandem)
+    metrics['tandem_bases'] = sum(r['end'] - r['start'] for r in tandem)
+    if tandem:
+        longest = max(tandem, key=lambda r: r['end'] - r['start'])
+        metrics['longest_tandem'] = f"({longest['unit']})x{longest['copies']:.1f}"
+        metrics['longest_tandem_start'] = longest['start']
+    return metrics
+
+
+def analyse_assembly(seq, options):
+    lab5 = load_lab5()
+    from qc import StageTimer, assembly_qc
+    seq = clean_sequence(seq)
+    if len(seq) < lab5.MIN_OVERLAP:
+        raise ValueError(f"sequence shorter than {lab5.MIN_OVERLAP} bases")
+    # seeded from the record itself so results do not depend on scheduling
+    random.seed(options['seed'] ^ zlib.crc32(seq[:1000].encode('ascii')))
+    num_reads = lab5.reads_for_coverage(len(seq), options['coverage'])
+    timer = StageTimer()
+    _, recon, contig_lengths = lab5.simulate_assembly(seq, options['engine'], num_reads, options['k'],
+                                                      timer=timer)
+    with timer.stage('qc'):
+        qc = assembly_qc(seq, recon, contig_lengths)
+    metrics = {'engine': options['engine'], 'reads': num_reads}
+    for key in ('recon_length', 'contigs', 'n50', 'l50', 'identity', 'edit_distance', 'recon_contains_reference'):
+        metrics[key] = qc[key]
+    metrics.update({f'seconds_{stage}': t for stage, t in timer.timings.items()})
+    return metrics
+
+
+ANALYSIS_FUNCTIONS = {
+    'composition': analyse_composition,
+    'tm': analyse_tm,
+    'repeats': analyse_repeats,
+    'assembly': analyse_assembly,
+}
+
+
+def run_task(task):
+    """Run the selected analyses on one record; errors are reported per analysis"""
+    index, path, header, seq, analyses, options = task
+    t0 = time.perf_counter()
+    results = {}
+    for name in analyses:
+        try:
+            results[name] = ANALYSIS_FUNCTIONS[name](seq, options)
+        except Exception as e:
+            results[name] = {'error': f"{type(e).__name__}: {e}"}
+    return {'index': index, 'file': path, 'record': header.split()[0] if header else '',
+            'length': len(seq), 'results': results, 'seconds': time.perf_counter() - t0}
+
+
+def iter_tasks(paths, analyses, options):
+    index = 0
+    for path in paths:
+        for header, seq in read_records(path):
+            yield index, path, header, seq, analyses, options
+            index += 1
+
+
+def run_pool(tasks, jobs, max_inflight):
+    """Yield results in completion order, keeping at most max_inflight records submitted
+
+    With jobs == 1 completion order is input order.
+    """
+    if jobs == 1:
+        yield from map(run_task, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = set()
+        for task in tasks:
+            pending.add(pool.submit(run_task, task))
+            if len(pending) >= max_inflight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def _format(value):
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+class TsvWriter:
+    def __init__(self, out):
+        self.out = out
+        out.write("file\trecord\tlength\tanalysis\tmetric\tvalue\n")
+
+    def write(self, result):
+        lead = f"{result['file']}\t{result['record']}\t{result['length']}"
+        for analysis, metrics in result['results'].items():
+            for metric, value in metrics.items():
+                self.out.write(f"{lead}\t{analysis}\t{metric}\t{_format(value)}\n")
+        self.out.flush()
+
+
+class JsonlWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, result):
+        self.out.write(json.dumps(result) + "\n")
+        self.out.flush()
+
+
+class Progress:
+    """Records, bases and throughput on stderr, at most once per interval"""
+
+    def __init__(self, interval=2.0, enabled=True):
+        self.interval = interval
+        self.enabled = enabled
+        self.start = self.last = time.perf_counter()
+        self.records = self.bases = self.errors = 0
+
+    def update(self, result):
+        self.records += 1
+        self.bases += result['length']
+        self.errors += sum('error' in m for m in result['results'].values())
+        now = time.perf_counter()
+        if self.enabled and now - self.last >= self.interval:
+            self.last = now
+            self.report(now)
+
+    def report(self, now=None, final=False):
+        elapsed = max((now or time.perf_counter()) - self.start, 1e-9)
+        line = (f"{self.records} records, {self.bases / 1e6:.2f} Mb in {elapsed:.1f}s "
+                f"({self.records / elapsed:.1f} records/s, {self.bases / 1e6 / elapsed:.2f} Mb/s)")
+        if self.errors:
+            line += f", {self.errors} failed analyses"
+        print(("done: " if final else "") + line, file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run lab analyses over every record of many FASTA files.")
+    parser.add_argument("inputs", nargs="+", help="FASTA files, globs (quote them; ** recurses) or directories")
+    parser.add_argument("-a", "--analyses", default="composition,tm,repeats",
+                        help=f"comma-separated, from {', '.join(ANALYSES)} (default: composition,tm,repeats)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=("tsv", "jsonl"),
+                        help="output format (default: from the output extension, else tsv)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--max-inflight", type=int, help="records submitted at once (default: 2 x jobs)")
+    parser.add_argument("--progress-interval", type=float, default=2.0, help="seconds between progress lines")
+    parser.add_argument("--no-progress", action="store_true")
+    parser.add_argument("--window", type=int, default=8, help="Tm window size (default: 8)")
+    parser.add_argument("--top", type=int, default=3, help="most frequent repeats to report (default: 3)")
+    parser.add_argument("--engine", choices=("greedy", "debruijn", "minimizer"), default="debruijn",
+                        help="assembly engine (default: debruijn)")
+    parser.add_argument("--coverage", type=float, default=20.0, help="simulated read coverage (default: 20)")
+    parser.add_argument("-k", type=int, default=31, help="k-mer size for the de Bruijn engine (default: 31)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    analyses = [a for a in args.analyses.split(',') if a]
+    unknown = [a for a in analyses if a not in ANALYSES]
+    if unknown or not analyses:
+        parser.error(f"unknown analyses: {', '.join(unknown)}" if unknown else "no analyses selected")
+    if args.jobs < 1 or args.window < 1:
+        parser.error("--jobs and --window must be positive")
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        parser.error("no input files matched")
+    fmt = args.format or ('jsonl' if args.output and args.output.endswith(('.jsonl', '.json')) else 'tsv')
+    options = {'window': args.window, 'top': args.top, 'engine': args.engine, 'coverage': args.coverage,
+               'k': args.k, 'seed': args.seed}
+
+    print(f"{len(paths)} files, analyses: {', '.join(analyses)}, {args.jobs} workers", file=sys.stderr)
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        writer = (JsonlWriter if fmt == 'jsonl' else TsvWriter)(out)
+        progress = Progress(args.progress_interval, not args.no_progress)
+        tasks = iter_tasks(paths, analyses, options)
+        for result in run_pool(tasks, args.jobs, args.max_inflight or 2 * args.jobs):
+            writer.write(result)
+            progress.update(result)
+        if not args.no_progress:
+            progress.report(final=True)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
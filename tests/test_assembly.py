@@ -0,0 +1,190 @@
+import random
+from collections import defaultdict
+
+import pytest
+
+from common.labs import load_lab5
+from common.synth import SyntheticGenome, plan_repeats
+
+lab5 = load_lab5()
+
+
+def baseline_maps(reads, min_olap, max_olap):
+    """The original build_prefix_suffix_maps: one dict entry per read and overlap length"""
+    pref = defaultdict(list)
+    suff = defaultdict(list)
+    for i, r in enumerate(reads):
+        for l in range(min_olap, min(max_olap, len(r)) + 1):
+            pref[(l, r[:l])].append(i)
+            suff[(l, r[-l:])].append(i)
+    return pref, suff
+
+
+class DictIndex:
+    """A baseline map with the candidates() interface of OverlapIndex"""
+
+    def __init__(self, table, min_olap, max_olap, suffix):
+        self.table, self.min_olap, self.max_olap, self.suffix = table, min_olap, max_olap, suffix
+
+    def candidates(self, contig):
+        for l in range(min(self.max_olap, len(contig)), self.min_olap - 1, -1):
+            yield l, self.table.get((l, contig[:l] if self.suffix else contig[-l:]), [])
+
+
+def baseline_assemble(reads, min_olap=30, max_olap=120):
+    """The original assemble_reads_greedy, dict maps and pairwise merge passes included"""
+    N = len(reads)
+    used = [False] * N
+    pref, suff = baseline_maps(reads, min_olap, max_olap)
+    contigs = []
+    indices = list(range(N))
+    random.shuffle(indices)
+    for idx in indices:
+        if used[idx]:
+            continue
+        contig = reads[idx]
+        used[idx] = True
+        extended = True
+        while extended:
+            extended = False
+            for table, suffix in ((pref, False), (suff, True)):
+                for l in range(min(max_olap, len(contig)), min_olap - 1, -1):
+                    key = (l, contig[:l] if suffix else contig[-l:])
+                    chosen = next((c for c in table.get(key, []) if not used[c] and reads[c] != contig), None)
+                    if chosen is not None:
+                        r = reads[chosen]
+                        contig = r[:len(r) - l] + contig if suffix else contig + r[l:]
+                        used[chosen] = True
+                        extended = True
+                        break
+                if extended:
+                    break
+        contigs.append(contig)
+
+    merged = True
+    while merged:
+        merged = False
+        contigs.sort(key=len, reverse=True)
+        new_contigs = []
+        skip = set()
+        for i in range(len(contigs)):
+            if i in skip:
+                continue
+            a = contigs[i]
+            for j in range(i + 1, len(contigs)):
+                if j in skip:
+                    continue
+                b = contigs[j]
+                top = min(len(a), len(b), max_olap)
+                l = next((l for l in range(top, min_olap - 1, -1) if a.endswith(b[:l])), 0)
+                if l:
+                    a = a + b[l:]
+                else:
+                    l = next((l for l in range(top, min_olap - 1, -1) if b.endswith(a[:l])), 0)
+                    if not l:
+                        continue
+                    a = b + a[l:]
+                skip.add(j)
+                merged = True
+                break
+            new_contigs.append(a)
+        contigs = new_contigs
+    return max(contigs, key=len) if contigs else ''
+
+
+def reference_merge(contigs, min_olap, max_olap):
+    """merge_contigs by comparing every pair: a contig's end joins the longest
+    overlapping start, ties going to the longer and then the earlier contig"""
+    contigs = dict(enumerate(contigs))
+    merged = True
+    while merged:
+        merged = False
+        for i in sorted(contigs, key=lambda i: len(contigs[i]), reverse=True):
+            while i in contigs:
+                a = contigs[i]
+                best = None
+                for l in range(min(len(a), max_olap), min_olap - 1, -1):
+                    for j, b in contigs.items():
+                        if j != i and l <= min(len(b), max_olap) and b.startswith(a[len(a) - l:]):
+                            if best is None or (len(b), -j) > (len(contigs[best]), -best):
+                                best = j
+                    if best is not None:
+                        break
+                if best is None:
+                    break
+                contigs[i] = a + contigs.pop(best)[l:]
+                merged = True
+    return list(contigs.values())
+
+
+def genome(seed, length=3000):
+    plan = plan_repeats(length, 8, unit_len=(2, 8), copies=(5, 20), seed=seed)
+    return SyntheticGenome(length, seed=seed, repeats=plan).sequence()
+
+
+def sample_reads(seq, seed, count=300):
+    random.seed(seed)
+    return lab5.take_reads(seq, count, lab5.MIN_READ_LEN, lab5.MAX_READ_LEN)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_index_matches_baseline_maps(seed):
+    reads = sample_reads(genome(seed), seed) + ['ACGT' * 8, 'ACG', '']
+    min_olap, max_olap = 30, 120
+    pref, suff = lab5.build_prefix_suffix_maps(reads, min_olap, max_olap)
+    base_pref, base_suff = baseline_maps(reads, min_olap, max_olap)
+    for index, table in ((pref, base_pref), (suff, base_suff)):
+        for key in random.Random(seed).sample(sorted(table), 2000):
+            assert index.get(key) == table[key]
+        l, s = next(iter(table))
+        assert index.get((l, s[:-1] + ('A' if s[-1] != 'A' else 'C'))) is None
+        assert index.get((l + 1, s)) is None and index.get((l, ''), []) == []
+        for read in reads[:50]:
+            contig = 'GATTACA' + read
+            expected = [(l, table.get((l, contig[:l] if index.suffix else contig[-l:]), []))
+                        for l in range(min(max_olap, len(contig)), min_olap - 1, -1)]
+            assert list(index.candidates(contig)) == expected
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_greedy_extension_is_unchanged_by_the_index(seed, monkeypatch):
+    reads = sample_reads(genome(seed), seed)
+    random.seed(seed)
+    assembled = lab5.assemble_reads_greedy(reads, 30, 120)
+
+    def dict_maps(reads, min_olap, max_olap):
+        pref, suff = baseline_maps(reads, min_olap, max_olap)
+        return DictIndex(pref, min_olap, max_olap, False), DictIndex(suff, min_olap, max_olap, True)
+
+    monkeypatch.setattr(lab5, 'build_prefix_suffix_maps', dict_maps)
+    random.seed(seed)
+    assert lab5.assemble_reads_greedy(reads, 30, 120) == assembled
+
+
+def fragments(seq, seed, count=60):
+    """Overlapping pieces of seq, some repeated or contained, in random order"""
+    rng = random.Random(seed)
+    pieces = []
+    for _ in range(count):
+        start = rng.randrange(len(seq) - 40)
+        pieces.append(seq[start:start + rng.randint(40, 400)])
+    return pieces
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_merge_contigs_matches_pairwise_reference(seed):
+    contigs = fragments(genome(seed, 2000), seed) + ['ACGT' * 5]
+    stats = {}
+    merged = lab5.merge_contigs(contigs, 30, 120, stats)
+    assert merged == reference_merge(contigs, 30, 120)
+    assert stats['merges'] == len(contigs) - len(merged)
+    assert stats['contig_lengths'] == sorted(map(len, merged), reverse=True)
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_assembly_matches_baseline(seed):
+    reads = sample_reads(genome(seed), seed)
+    random.seed(seed)
+    expected = baseline_assemble(reads)
+    random.seed(seed)
+    assert lab5.assemble_reads_greedy(reads, 30, 120) == expected
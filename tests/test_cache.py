@@ -0,0 +1,63 @@
+import os
+import random
+import time
+
+from common.cache import SequenceCache
+
+
+def text(seed, n=4000):
+    rng = random.Random(seed)
+    return ''.join(rng.choice('ACGT') for _ in range(n))
+
+
+def fill(cache, keys):
+    """Put one entry per key, each a minute more recent than the one before"""
+    now = time.time()
+    for i, key in enumerate(keys):
+        cache.put(key, text(key))
+        t = now - 3600 + 60 * i
+        os.utime(cache._path(key), (t, t))
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = SequenceCache(str(tmp_path))
+    assert cache.get('missing') is None
+    cache.put('seq', 'ACGT')
+    cache.put_json('search', {'ids': ['A.1']})
+    assert cache.get('seq') == 'ACGT' and cache.get_json('search') == {'ids': ['A.1']}
+    assert (cache.hits, cache.misses) == (2, 1)
+    with open(cache._path('seq'), 'wb') as f:
+        f.write(b'not gzip')
+    assert cache.get('seq') is None
+
+
+def test_size_tracks_overwrites(tmp_path):
+    cache = SequenceCache(str(tmp_path))
+    cache.put('a', text(1))
+    cache.put('a', text(2, 100))
+    cache.put('b', text(3))
+    on_disk = sum(os.path.getsize(cache._path(k)) for k in 'ab')
+    assert cache.size() == on_disk == SequenceCache(str(tmp_path)).size()
+
+
+def test_least_recently_used_go_first(tmp_path):
+    cache = SequenceCache(str(tmp_path))
+    fill(cache, 'abcde')
+    cache.get('a')
+    cache.evict(target=cache.size() - 1)
+    cache.evict(target=cache.size() - 1)
+    assert cache.evictions == 2
+    assert [k for k in 'abcde' if cache.get(k) is not None] == ['a', 'd', 'e']
+
+
+def test_put_evicts_with_headroom(tmp_path):
+    probe = SequenceCache(str(tmp_path / 'probe'))
+    probe.put('x', text('x'))
+    entry = probe.size()
+    cache = SequenceCache(str(tmp_path / 'cache'), max_bytes=int(entry * 4.2))
+    fill(cache, 'abcd')
+    assert cache.evictions == 0
+    cache.put('e', text('e'))
+    # 5 entries exceed max_bytes; the oldest go until at most 90% of it is left
+    assert cache.evictions == 2 and cache.size() <= cache.max_bytes * 0.9
+    assert [k for k in 'abcde' if cache.get(k) is not None] == ['c', 'd', 'e']
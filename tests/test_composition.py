@@ -0,0 +1,18 @@
+import random
+
+import pytest
+
+from composition import composition_profile, window_profiles
+
+
+def test_windows_match_whole_sequence_profiles():
+    rng = random.Random(0)
+    seq = ''.join(rng.choice('ACGT') for _ in range(1003))
+    rows = window_profiles(seq, 100)
+    assert [row['start'] for row in rows] == list(range(0, 1003, 100))
+    assert rows[-1]['length'] == 3
+    for row in rows:
+        profile = composition_profile(seq[row['start']:row['start'] + 100])
+        for level in ('mono', 'di', 'tri'):
+            assert sum(row[level].values()) == pytest.approx(100)
+            assert row[level] == pytest.approx(profile[level])
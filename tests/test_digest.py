@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from digest import (EnzymePanel, IUPAC, digest, digest_all, expand_iupac, fragment_lengths, parse_site,
+                    reverse_complement_site)
+
+PANEL = {
+    'EcoRI': 'G^AATTC',
+    'HinfI': 'G^ANTC',
+    'AluI': 'AG^CT',
+    'BsrI': 'ACTGG^',
+    'Blunt': 'GCYNRGC',
+}
+
+
+def naive_cuts(seq, enzymes, circular=False):
+    """Cut positions by trying every site on both strands at every position"""
+    n = len(seq)
+    text = seq + seq if circular else seq
+    cuts = {}
+    for name, site in enzymes.items():
+        bases, cut = parse_site(site)
+        strands = [(bases, cut)]
+        rc = reverse_complement_site(bases)
+        if rc != bases:
+            # the bottom-strand site; its top-strand cut mirrors the top-strand one
+            strands.append((rc, len(bases) - cut))
+        found = set()
+        for pattern, offset in strands:
+            for p in range(n if circular else n - len(pattern) + 1):
+                window = text[p:p + len(pattern)]
+                if len(window) == len(pattern) and all(c in IUPAC[b] for c, b in zip(window, pattern)):
+                    found.add(p + offset)
+        if circular:
+            cuts[name] = sorted({c % n for c in found})
+        else:
+            cuts[name] = sorted(c for c in found if 0 < c < n)
+    return cuts
+
+
+def random_seq(n, seed):
+    rng = random.Random(seed)
+    return ''.join(rng.choice('ACGT') for _ in range(n))
+
+
+def test_parse_site():
+    assert parse_site('g^aattc') == ('GAATTC', 1)
+    assert parse_site('GATATC') == ('GATATC', 6)
+    with pytest.raises(ValueError):
+        parse_site('GAXTC')
+
+
+def test_expand_iupac():
+    assert sorted(expand_iupac('GANTC')) == ['GAATC', 'GACTC', 'GAGTC', 'GATTC']
+    with pytest.raises(ValueError):
+        expand_iupac('N' * 9)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_cuts_match_brute_force(seed):
+    seq = random_seq(3000, seed)
+    cuts, length = EnzymePanel(PANEL).find_cuts(seq)
+    assert length == len(seq)
+    assert cuts == naive_cuts(seq, PANEL)
+
+
+def test_chunks_give_the_same_cuts():
+    seq = random_seq(5000, 7)
+    panel = EnzymePanel(PANEL)
+    whole, _ = panel.find_cuts(seq)
+    assert panel.find_cuts(seq, chunk_size=37)[0] == whole
+    assert panel.find_cuts(seq[i:i + 101] for i in range(0, len(seq), 101))[0] == whole
+
+
+def test_circular_finds_sites_across_the_origin():
+    seq = 'ATTC' + random_seq(200, 3).replace('GAATTC', 'GTATTC') + 'GA'
+    panel = EnzymePanel(['EcoRI'])
+    assert panel.find_cuts(seq)[0]['EcoRI'] == naive_cuts(seq, {'EcoRI': 'G^AATTC'})['EcoRI']
+    cuts, length = panel.find_cuts(seq, circular=True)
+    assert length - 1 in cuts['EcoRI']
+    assert cuts == naive_cuts(seq, {'EcoRI': 'G^AATTC'}, circular=True)
+
+
+def test_fragments():
+    assert fragment_lengths([], 10) == [10]
+    assert fragment_lengths([3, 7, 3], 10) == [3, 4, 3]
+    assert fragment_lengths([3, 7], 10, circular=True) == [4, 6]
+    seq = random_seq(4000, 11)
+    cuts, length = EnzymePanel(PANEL).find_cuts(seq)
+    for combo, fragments in digest_all(cuts, length).items():
+        assert sum(fragments) == length
+        assert len(fragments) == len(set().union(*(cuts[name] for name in combo))) + 1
+    assert digest(cuts, length, ['EcoRI', 'AluI']) == digest_all(cuts, length)[('EcoRI', 'AluI')]
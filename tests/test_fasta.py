@@ -0,0 +1,82 @@
+import os
+import random
+
+import pytest
+
+from common.fasta import FastaIndex, build_fai, clean_sequence, parse_fasta, parse_records, read_records
+
+
+def write(path, records, width, newline='\n'):
+    with open(path, 'w', newline='') as f:
+        for name, seq in records:
+            f.write(f'>{name} description{newline}')
+            for i in range(0, len(seq), width):
+                f.write(seq[i:i + width] + newline)
+
+
+def random_records(seed, count=4):
+    rng = random.Random(seed)
+    return [(f'chr{i}', ''.join(rng.choice('ACGTN') for _ in range(rng.randint(0, 500)))) for i in range(count)]
+
+
+def test_read_records(tmp_path):
+    records = random_records(1)
+    path = tmp_path / 'a.fa'
+    write(path, records, 60)
+    assert [(h.split()[0], s) for h, s in read_records(str(path))] == records
+    assert list(read_records(['>x', 'AC', '', 'GT'])) == [('x', 'ACGT')]
+    assert list(parse_records('ACGT\n>y\nTT\n')) == [('', 'ACGT'), ('y', 'TT')]
+
+
+def test_parse_fasta_and_clean():
+    assert parse_fasta('>x desc\nacgtXn\n>y\nA') == ('x desc', 'ACGTN')
+    assert parse_fasta('ACGT') == ('UNKNOWN', '')
+    assert clean_sequence('ac-gt n') == 'ACGTN'
+
+
+@pytest.mark.parametrize('width,newline', [(60, '\n'), (7, '\n'), (50, '\r\n')])
+def test_fetch_matches_slicing(tmp_path, width, newline):
+    records = random_records(width)
+    path = tmp_path / 'a.fa'
+    write(path, records, width, newline)
+    rng = random.Random(0)
+    with FastaIndex(str(path)) as index:
+        assert index.names == [name for name, _ in records]
+        for name, seq in records:
+            assert index.length(name) == len(seq)
+            assert index.fetch(name) == seq
+            for _ in range(50):
+                a, b = sorted(rng.randint(-5, len(seq) + 5) for _ in range(2))
+                assert index.fetch(name, a, b) == seq[max(a, 0):b]
+    assert os.path.exists(str(path) + '.fai')
+
+
+def test_index_is_rebuilt_when_stale(tmp_path):
+    path = tmp_path / 'a.fa'
+    write(path, [('x', 'ACGT' * 10)], 10)
+    with FastaIndex(str(path)) as index:
+        assert index.length('x') == 40
+    write(path, [('x', 'ACGT' * 20)], 10)
+    os.utime(path, (os.path.getmtime(str(path) + '.fai') + 10,) * 2)
+    with FastaIndex(str(path)) as index:
+        assert index.length('x') == 80
+
+
+@pytest.mark.parametrize('text,error', [
+    ('>x\nACGT\nACGT\n\nACGT\n', 'blank line'),
+    ('>x\n\nACGT\n', 'blank line'),
+    ('>x\nACGT\nAC\nACGT\n', 'uneven line lengths'),
+])
+def test_malformed_records_are_rejected(tmp_path, text, error):
+    path = tmp_path / 'bad.fa'
+    path.write_text(text)
+    with pytest.raises(ValueError, match=error):
+        build_fai(str(path))
+
+
+def test_trailing_blank_lines_are_accepted(tmp_path):
+    path = tmp_path / 'a.fa'
+    path.write_text('>x\nACGT\nAC\n\n>y\nGGGG\n\n\n')
+    with FastaIndex(str(path)) as index:
+        assert index.fetch('x', 1, 6) == 'CGTAC'
+        assert index.fetch('y') == 'GGGG'
@@ -0,0 +1,242 @@
+"""EutilsClient and the cached fetch layer against a local stub E-utilities server."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import parse
+
+import pytest
+
+from common.cache import SequenceCache
+from common.ncbi import EutilsClient, RateLimiter, fetch_records, search_ids
+
+
+def _sequence(uid):
+    # distinct per accession, and only ACGT so it survives clean_sequence
+    return 'ACGT' * 10 + ''.join('ACGT'[int(d) // 4] + 'ACGT'[int(d) % 4] for d in uid[2:8])
+
+
+class StubEutils:
+    """E-utilities stand-in that answers efetch in request order
+
+    Like NCBI, esearch returns GI numbers unless asked for idtype=acc, and
+    efetch takes either but always heads records with the versioned accession.
+
+    drop: accessions left out of multi-ID efetch answers (still served one at a time)
+    lost: accessions never served
+    failures: number of leading requests answered with `failure_status`
+    (None closes the connection without an answer)
+    """
+
+    def __init__(self):
+        self.ids = [f'MN{i:06d}.1' for i in range(100)]
+        self.gis = {str(1800000000 + i): uid for i, uid in enumerate(self.ids)}
+        self.drop = set()
+        self.lost = set()
+        self.failures = 0
+        self.failure_status = 503
+        self.requests = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = parse.urlsplit(self.path)
+                stub.handle(self, url.path, dict(parse.parse_qsl(url.query)))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+                stub.handle(self, parse.urlsplit(self.path).path, dict(parse.parse_qsl(body)))
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/eutils/'
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, handler, path, params):
+        with self.lock:
+            self.requests.append((time.monotonic(), path.rsplit('/', 1)[-1], params))
+            failing = self.failures > 0
+            self.failures -= failing
+        if failing and self.failure_status is None:
+            handler.close_connection = True
+            return
+        if failing:
+            return self.reply(handler, b'busy', self.failure_status)
+        if path.endswith('esearch.fcgi'):
+            start, count = int(params['retstart']), int(params['retmax'])
+            ids = self.ids if params.get('idtype') == 'acc' else list(self.gis)
+            result = {'count': str(len(ids)), 'idlist': ids[start:start + count]}
+            return self.reply(handler, json.dumps({'esearchresult': result}).encode())
+        if path.endswith('efetch.fcgi'):
+            ids = [self.gis.get(uid, uid) for uid in params['id'].split(',')]
+            served = [uid for uid in ids if uid not in self.lost and (len(ids) == 1 or uid not in self.drop)]
+            text = ''.join(f'>{uid} stub record\n{_sequence(uid)}\n' for uid in served)
+            return self.reply(handler, text.encode())
+        self.reply(handler, b'', 404)
+
+    def reply(self, handler, body, status=200):
+        handler.send_response(status)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def calls(self, endpoint):
+        return [r for r in self.requests if r[1] == endpoint]
+
+
+@pytest.fixture
+def stub():
+    server = StubEutils()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(stub):
+    with EutilsClient(base_url=stub.url, rate=0, batch_size=50, backoff=0.01) as c:
+        yield c
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SequenceCache(str(tmp_path / 'cache'))
+
+
+def test_batches_pair_records_with_ids(stub, client, cache):
+    ids = stub.ids[::-1]
+    records = fetch_records(ids, client, cache, offline=False)
+    assert len(stub.calls('efetch.fcgi')) == 2
+    assert set(records) == set(ids)
+    for uid in ids:
+        header, seq = records[uid]
+        assert header.startswith(uid + ' ') and seq == _sequence(uid)
+
+
+def test_short_batch_is_paired_by_accession(stub, client, cache, capsys):
+    stub.drop = {stub.ids[7]}
+    records = fetch_records(stub.ids, client, cache, offline=False)
+    assert set(records) == set(stub.ids)
+    assert records[stub.ids[8]][1] == _sequence(stub.ids[8])
+    assert 'returned 49 of 50' in capsys.readouterr().err
+    # only the dropped ID is fetched again, on its own
+    assert [r[2]['id'] for r in stub.calls('efetch.fcgi')][-1] == stub.ids[7]
+
+
+def test_unrecoverable_ids_are_reported(stub, client, cache, capsys):
+    stub.lost = {stub.ids[10], stub.ids[60]}
+    records = fetch_records(stub.ids, client, cache, offline=False)
+    assert len(records) == 98 and not stub.lost & set(records)
+    err = capsys.readouterr().err
+    assert '2 of 100 records not returned by efetch' in err
+    assert stub.ids[10] in err and stub.ids[60] in err
+
+
+def test_search_returns_accessions_that_key_the_cache(stub, client, cache):
+    ids = search_ids('term', 60, client, cache, offline=False)
+    assert ids == stub.ids[:60]
+    assert {r[2]['idtype'] for r in stub.calls('esearch.fcgi')} == {'acc'}
+    stub.drop = {ids[3]}
+    records = fetch_records(ids, client, cache, offline=False)
+    assert set(records) == set(ids)
+    # the short batch pairs by accession: only the dropped record is fetched alone
+    assert [r[2]['id'] for r in stub.calls('efetch.fcgi') if ',' not in r[2]['id']] == [ids[3]]
+    assert all(cache.get(f'nuccore:{uid}') for uid in ids)
+
+
+def test_retries_with_backoff_then_succeeds(stub, client):
+    stub.failures = 2
+    assert client.esearch('anything', retmax=5) == stub.ids[:5]
+    times = [r[0] for r in stub.calls('esearch.fcgi')]
+    assert len(times) == 3
+    assert times[2] - times[1] >= times[1] - times[0] >= 0.01
+
+
+def test_dropped_connections_are_retried(stub, client):
+    stub.failures = 2
+    stub.failure_status = None
+    assert client.esearch('anything', retmax=5) == stub.ids[:5]
+    assert len(stub.requests) == 3
+
+
+def test_retries_give_up(stub, client):
+    stub.failures = 10
+    with pytest.raises(RuntimeError, match='HTTP 503'):
+        client.esearch('anything', retmax=5)
+    assert len(stub.requests) == client.retries + 1
+
+
+def test_client_errors_are_not_retried(stub, client):
+    stub.failures = 1
+    stub.failure_status = 400
+    with pytest.raises(RuntimeError, match='HTTP 400'):
+        client.esearch('anything', retmax=5)
+    assert len(stub.requests) == 1
+
+
+def test_esearch_pages(stub, client, monkeypatch):
+    monkeypatch.setattr('common.ncbi.ESEARCH_PAGE', 30)
+    assert client.esearch('anything', retmax=1000) == stub.ids
+    assert [r[2]['retstart'] for r in stub.calls('esearch.fcgi')] == ['0', '30', '60', '90']
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(50)
+    t0 = time.monotonic()
+    for _ in range(6):
+        limiter.wait()
+    assert time.monotonic() - t0 >= 5 / 50 * 0.9
+
+
+def test_client_requests_follow_rate(stub):
+    with EutilsClient(base_url=stub.url, rate=20, batch_size=10, max_workers=3) as c:
+        c.fetch_many(stub.ids[:40])
+    times = sorted(r[0] for r in stub.requests)
+    assert len(times) == 4
+    assert times[-1] - times[0] >= 3 / 20 * 0.9
+
+
+def test_cache_serves_second_fetch(stub, client, cache):
+    fetch_records(stub.ids[:10], client, cache, offline=False)
+    before = len(stub.requests)
+    records = fetch_records(stub.ids[:10], client, cache, offline=False)
+    assert len(records) == 10 and len(stub.requests) == before
+
+
+def test_offline_uses_cache_only(stub, client, cache, capsys):
+    fetch_records(stub.ids[:5], client, cache, offline=False)
+    before = len(stub.requests)
+    records = fetch_records(stub.ids[:8], client, cache, offline=True)
+    assert set(records) == set(stub.ids[:5])
+    assert len(stub.requests) == before
+    assert '3 of 3 records not cached (offline mode)' in capsys.readouterr().err
+
+
+def test_offline_search_needs_cache(stub, client, cache):
+    with pytest.raises(RuntimeError, match='not cached'):
+        search_ids('term', 10, client, cache, offline=True)
+    assert not stub.requests
+
+
+def test_search_results_expire(stub, client, cache):
+    assert search_ids('term', 10, client, cache, offline=False) == stub.ids[:10]
+    search_ids('term', 10, client, cache, offline=False)
+    assert len(stub.requests) == 1
+    stub.ids = stub.ids[::-1]
+    assert search_ids('term', 10, client, cache, offline=False, ttl=0) == stub.ids[:10]
+    assert len(stub.requests) == 2
+
+
+def test_offline_search_uses_expired_result(stub, client, cache, capsys):
+    search_ids('term', 10, client, cache, offline=False)
+    assert search_ids('term', 10, client, cache, offline=True, ttl=0) == stub.ids[:10]
+    assert 'expired' in capsys.readouterr().err
@@ -0,0 +1,84 @@
+import random
+
+import numpy as np
+
+from common.kmers import INVALID, base_codes, encode_kmers
+from common.packed import PackedSeq, read_packed, write_packed
+from lab7 import find_repetitive_sequences, kmer_positions, top_repetitive_sequences
+from tandem import find_tandem_repeats
+
+
+def random_seq(n, seed, alphabet='ACGT'):
+    rng = random.Random(seed)
+    return ''.join(rng.choice(alphabet) for _ in range(n))
+
+
+def test_round_trip():
+    for seq in ('', 'A', 'ACGTN', 'acgtRYn', random_seq(1001, 1, 'ACGTACGTN')):
+        packed = PackedSeq(seq)
+        expected = ''.join(c if c in 'ACGT' else 'N' for c in seq.upper())
+        assert str(packed) == expected and len(packed) == len(seq)
+        assert packed == expected
+
+
+def test_equality_with_str_is_exact_and_agrees_with_hash():
+    packed = PackedSeq('ACGN')
+    assert packed == 'ACGN' and packed == PackedSeq('acgr')
+    assert packed != 'acgr' and packed != 'acgn'
+    assert 'ACGN' in {packed} and 'acgr' not in {packed}
+    assert hash(packed) == hash('ACGN') == hash(PackedSeq('acgr'))
+
+
+def test_slices_are_views():
+    seq = random_seq(1000, 2, 'ACGTACGTN')
+    packed = PackedSeq(seq)
+    rng = random.Random(0)
+    for _ in range(200):
+        a, b = sorted(rng.randint(0, len(seq)) for _ in range(2))
+        view = packed[a:b]
+        assert view.nbytes == packed.nbytes
+        assert str(view) == str(packed)[a:b]
+        assert np.array_equal(view.codes(), base_codes(str(packed)[a:b]))
+    assert packed[5] == str(packed)[5] and packed[-1] == str(packed)[-1]
+    assert str(packed[::3]) == str(packed)[::3]
+
+
+def test_codes_and_kmers():
+    seq = random_seq(700, 3, 'ACGTACGTN')
+    packed = PackedSeq(seq)
+    codes = packed.codes()
+    assert np.array_equal(codes, base_codes(seq))
+    assert (codes == INVALID).sum() == seq.count('N')
+    assert np.array_equal(np.concatenate(list(packed[3:].iter_codes(64))), codes[3:])
+    for got, expected in zip(packed.kmers(5), encode_kmers(codes, 5)):
+        assert np.array_equal(got, expected)
+
+
+def test_reverse_complement():
+    assert str(PackedSeq('AACGTN').reverse_complement()) == 'NACGTT'
+
+
+def test_fasta_round_trip(tmp_path):
+    records = [('a', random_seq(130, 4)), ('b', 'ACGTN' * 7)]
+    path = tmp_path / 'p.fa'
+    write_packed(str(path), records, line_width=50)
+    assert [(h, str(s)) for h, s in read_packed(str(path))] == records
+
+
+def test_lab7_accepts_packed_sequences():
+    seq = random_seq(3000, 5, 'ACGT' * 30 + 'N')
+    packed = PackedSeq(seq)
+    repeats = find_repetitive_sequences(packed)
+    assert repeats == find_repetitive_sequences(seq)
+    assert all(type(pattern) is str for pattern in repeats)
+    assert any('N' in pattern for pattern in repeats)
+    assert top_repetitive_sequences(packed) == top_repetitive_sequences(seq)
+    assert kmer_positions(packed, 40) == kmer_positions(seq, 40)
+
+
+def test_tandem_repeats_from_packed_sequence():
+    seq = random_seq(5000, 6)
+    seq = seq[:1000] + 'CA' * 30 + seq[1000:3000] + 'AGC' * 20 + seq[3000:]
+    expected = list(find_tandem_repeats(seq, chunk_size=512))
+    assert {r['unit'] for r in expected} >= {'CA', 'AGC'}
+    assert list(find_tandem_repeats(PackedSeq(seq), chunk_size=512)) == expected
@@ -0,0 +1,94 @@
+import json
+import os
+import random
+
+import pytest
+
+from overlap import edit_distance, overlap_distance
+from qc import assembly_qc, banded_edit_distance, contig_stats, exact_matches, identity, write_report, z_function
+
+
+def levenshtein(a, b):
+    prev = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        row = [i]
+        for j, y in enumerate(b, 1):
+            row.append(min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (x != y)))
+        prev = row
+    return prev[-1]
+
+
+def mutate(seq, edits, rng):
+    seq = list(seq)
+    for _ in range(edits):
+        i = rng.randrange(len(seq) + 1)
+        kind = rng.randrange(3)
+        if kind == 0 and i < len(seq):
+            seq[i] = rng.choice('ACGT')
+        elif kind == 1 and i < len(seq):
+            del seq[i]
+        else:
+            seq.insert(i, rng.choice('ACGT'))
+    return ''.join(seq)
+
+
+def pairs(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        a = ''.join(rng.choice('ACGT') for _ in range(rng.randint(0, 90)))
+        if rng.random() < 0.3:
+            b = ''.join(rng.choice('ACGT') for _ in range(rng.randint(0, 90)))
+        else:
+            b = mutate(a, rng.randint(0, 8), rng) if a else 'ACGT'
+        yield a, b
+
+
+def test_z_function():
+    for s in ('AACAACAAT', 'AAAAA', 'ACGT', ''):
+        assert z_function(s) == [len(os.path.commonprefix([s, s[i:]])) for i in range(len(s))]
+
+
+def test_exact_matches():
+    m = exact_matches('GGACGTACGT', 'ACGTACGTTT')
+    assert m['overlap_reference_recon'] == 8 and not m['recon_contains_reference']
+    m = exact_matches('CGTA', 'TTACGTAC')
+    assert m['recon_contains_reference'] and m['reference_offset_in_recon'] == 3
+    assert not exact_matches('ACGT', '')['reference_contains_recon']
+
+
+def test_distances_match_levenshtein():
+    for a, b in pairs(300, 1):
+        expected = levenshtein(a, b)
+        assert edit_distance(a, b) == expected
+        assert banded_edit_distance(a, b, band=100) == expected
+        assert identity(a, b)[0] == identity(b, a)[0] == expected
+
+
+def test_narrow_band_is_an_upper_bound():
+    for a, b in pairs(100, 2):
+        assert banded_edit_distance(a, b, band=2) >= levenshtein(a, b)
+
+
+def test_overlap_distance():
+    rng = random.Random(3)
+    read = ''.join(rng.choice('ACGT') for _ in range(60))
+    errors, length = overlap_distance(read[-40:], read[20:] + 'TTTTTTTT', band=5)
+    assert (errors, length) == (0, 40)
+    errors, length = overlap_distance(read[-40:], mutate(read[20:], 2, rng) + 'GGGG', band=5)
+    assert errors <= 2 and abs(length - 40) <= 2
+
+
+def test_contig_stats():
+    stats = contig_stats([50, 'A' * 30, 20, 10])
+    assert stats == {'contigs': 4, 'total_length': 110, 'largest': 50, 'n50': 30, 'l50': 2}
+    assert contig_stats([])['n50'] == 0
+
+
+@pytest.mark.parametrize('recon', ['TTACGTACGTAAGG', 'GTACG'])
+def test_assembly_qc_containment(recon, tmp_path):
+    reference = 'ACGTACGTAA'
+    report = assembly_qc(reference, recon)
+    assert report['edit_distance'] == levenshtein(reference, recon)
+    assert report['identity'] == pytest.approx(1 - report['edit_distance'] / max(len(reference), len(recon)))
+    write_report(tmp_path / 'qc.json', report)
+    assert json.loads((tmp_path / 'qc.json').read_text()) == report
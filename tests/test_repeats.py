@@ -0,0 +1,71 @@
+import random
+from collections import Counter, defaultdict
+
+import pytest
+
+from common.packed import PackedSeq
+from lab7 import find_repetitive_sequences, kmer_positions, top_repetitive_sequences
+from lab7ex2 import find_most_frequent_repeat, most_frequent_repeats
+
+
+def baseline_repetitive_sequences(dna_sequence, min_length=3, max_length=6, min_repetitions=2):
+    """The original quadratic scan from lab7"""
+    repetitive_sequences = defaultdict(list)
+    for pattern_length in range(min_length, max_length + 1):
+        for i in range(len(dna_sequence) - pattern_length + 1):
+            pattern = dna_sequence[i:i + pattern_length]
+            positions = []
+            for j in range(len(dna_sequence) - pattern_length + 1):
+                if dna_sequence[j:j + pattern_length] == pattern:
+                    positions.append(j)
+            if len(positions) >= min_repetitions:
+                if pattern not in repetitive_sequences:
+                    repetitive_sequences[pattern] = positions
+    return repetitive_sequences
+
+
+def baseline_frequent_repeats(sequence, min_length=3, max_length=10):
+    """The original lab7ex2 count, returning every repeat it ranked instead of only the first"""
+    repeat_counts = Counter()
+    for length in range(min_length, max_length + 1):
+        for i in range(len(sequence) - length + 1):
+            substring = sequence[i:i + length]
+            if substring.count('N') == 0:
+                repeat_counts[substring] += 1
+    return [(seq, count) for seq, count in repeat_counts.most_common(20) if count > 1]
+
+
+def random_seq(n, seed, alphabet='ACGT'):
+    rng = random.Random(seed)
+    return ''.join(rng.choice(alphabet) for _ in range(n))
+
+
+SEQUENCES = [random_seq(400, 1), random_seq(300, 2, 'ACGT' * 8 + 'N'), random_seq(200, 3, 'AT'), 'ACGTN', '']
+
+
+@pytest.mark.parametrize('seq', SEQUENCES)
+def test_repetitive_sequences_match_baseline(seq):
+    expected = baseline_repetitive_sequences(seq)
+    found = find_repetitive_sequences(seq)
+    assert list(found.items()) == list(expected.items())
+    assert list(find_repetitive_sequences(seq, 2, 12, 3).items()) == list(baseline_repetitive_sequences(seq, 2, 12, 3).items())
+
+
+@pytest.mark.parametrize('seq', SEQUENCES)
+def test_top_repetitive_sequences_match_display_order(seq):
+    ranked = sorted(baseline_repetitive_sequences(seq).items(), key=lambda x: (len(x[1]), len(x[0])), reverse=True)
+    assert top_repetitive_sequences(seq) == ranked[:20]
+    assert top_repetitive_sequences(PackedSeq(seq), top_n=5) == ranked[:5]
+
+
+def test_long_patterns_fall_back_to_strings():
+    seq = random_seq(150, 4) * 2
+    assert kmer_positions(seq, 40, 2) == [(seq[i:i + 40], [i, i + 150]) for i in range(111)]
+
+
+@pytest.mark.parametrize('seq', SEQUENCES + [random_seq(3000, 5)])
+def test_most_frequent_repeats_match_baseline(seq):
+    expected = baseline_frequent_repeats(seq)
+    assert most_frequent_repeats(seq) == expected
+    assert find_most_frequent_repeat(seq) == (expected[0] if expected else (None, 0))
+    assert most_frequent_repeats(seq, 5, 4, 8) == baseline_frequent_repeats(seq, 4, 8)[:5]
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from common.fasta import read_records
+from common.synth import BLOCK, SyntheticGenome, plan_repeats, random_dna, write_fasta
+
+
+@pytest.fixture(scope='module')
+def genome():
+    length = 2 * BLOCK + 12345
+    return SyntheticGenome(length, gc=0.4, seed=7, repeats=plan_repeats(length, 50, seed=7))
+
+
+@pytest.fixture(scope='module')
+def whole(genome):
+    return genome.sequence()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 977, 4096, BLOCK - 1, BLOCK, BLOCK + 3, 10 * BLOCK])
+def test_chunks_do_not_depend_on_chunk_size(genome, whole, chunk_size):
+    if chunk_size == 1:
+        chunks = [c for _, c in zip(range(5000), genome.chunks(1))]
+        assert ''.join(chunks) == whole[:5000]
+        return
+    chunks = list(genome.chunks(chunk_size))
+    assert all(len(c) == chunk_size for c in chunks[:-1])
+    assert ''.join(chunks) == whole
+
+
+def test_regions_match_the_whole_sequence(genome, whole):
+    for start in (0, BLOCK - 5, 2 * BLOCK + 1, len(genome)):
+        assert genome.fetch(start, start + BLOCK + 7) == whole[start:start + BLOCK + 7]
+    rng = random.Random(0)
+    for start in [BLOCK - 500, 2 * BLOCK - 1] + [rng.randrange(len(genome)) for _ in range(6)]:
+        size = rng.choice((1, 10, 1000))
+        assert genome.fetch(start, start + size) == whole[start:start + size]
+
+
+def test_seed_and_repeats(genome, whole):
+    assert SyntheticGenome(len(genome), gc=0.4, seed=7, repeats=genome.repeats).sequence() == whole
+    assert SyntheticGenome(len(genome), gc=0.4, seed=8).fetch(0, 1000) != whole[:1000]
+    for pos, unit, copies in genome.repeats:
+        assert whole[pos:pos + len(unit) * copies] == unit * copies
+    spans = sorted((pos, pos + len(unit) * copies) for pos, unit, copies in genome.repeats)
+    assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:]))
+    gc = (whole.count('G') + whole.count('C')) / len(whole)
+    assert abs(gc - 0.4) < 0.01
+
+
+def test_write_fasta_does_not_depend_on_chunking(tmp_path):
+    genomes = [('a', SyntheticGenome(10000, seed=1)), ('b', SyntheticGenome(777, seed=2))]
+    outputs = []
+    for lines_per_chunk in (1, 3, 1000):
+        path = tmp_path / f'{lines_per_chunk}.fa'
+        write_fasta(str(path), genomes, line_width=60, lines_per_chunk=lines_per_chunk)
+        outputs.append(path.read_text())
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert [(h, s) for h, s in read_records(str(tmp_path / '1.fa'))] == [(n, g.sequence()) for n, g in genomes]
+
+
+def test_random_dna_follows_the_random_module():
+    random.seed(3)
+    first = random_dna(500)
+    random.seed(3)
+    assert random_dna(500) == first and set(first) <= set('ACGT')
+    assert random_dna(500, seed=1) == random_dna(500, seed=1)
+    with pytest.raises(ValueError):
+        SyntheticGenome(10, gc=1.5)
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from common.kmers import base_codes
+from tandem import find_tandem_repeats, scan_codes
+
+
+def random_seq(n, rng):
+    return ''.join(rng.choice('ACGT') for _ in range(n))
+
+
+def adjacent_repeats(seed):
+    """Runs of imperfect tandem repeats, some back to back, separated by random DNA"""
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(30):
+        if rng.random() < 0.6:
+            unit = random_seq(rng.randint(1, 10), rng)
+            copies = list(unit * rng.randint(2, 30))
+            for _ in range(rng.randint(0, 3)):
+                copies[rng.randrange(len(copies))] = rng.choice('ACGTN')
+            parts.append(''.join(copies))
+        else:
+            parts.append(random_seq(rng.randint(0, 60), rng))
+    return ''.join(parts)
+
+
+def calls(repeats):
+    return [(r['start'], r['end'], r['period'], r['unit']) for r in repeats]
+
+
+def test_finds_repeat_with_substitution():
+    rng = random.Random(0)
+    repeat = list('CA' * 20)
+    repeat[21] = 'G'
+    seq = random_seq(500, rng) + ''.join(repeat) + random_seq(500, rng)
+    (r,) = [r for r in find_tandem_repeats(seq) if r['end'] - r['start'] >= 30]
+    assert r['period'] == 2 and r['unit'] in ('CA', 'AC')
+    assert abs(r['start'] - 500) <= 5 and abs(r['end'] - 540) <= 5
+
+
+def test_harmonics_do_not_merge_into_neighbouring_repeat():
+    rng = random.Random(1)
+    seq = random_seq(3000, rng) + 'TGAT' * 44 + random_seq(6, rng) + 'GGTAATCT' * 45 + random_seq(3000, rng)
+    tgat, ggtaatct = [r for r in scan_codes(base_codes(seq)) if r['end'] - r['start'] > 100]
+    assert (tgat['start'], tgat['period'], tgat['unit']) == (3000, 4, 'TGAT')
+    assert calls([ggtaatct]) == [(3182, 3542, 8, 'GGTAATCT')]
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_output_does_not_depend_on_chunk_size(seed):
+    seq = adjacent_repeats(seed)
+    whole = calls(find_tandem_repeats(seq, chunk_size=len(seq)))
+    for chunk_size in (7, 64, 101, 999):
+        assert calls(find_tandem_repeats(seq, chunk_size=chunk_size)) == whole
+    pieces = [seq[i:i + 50] for i in range(0, len(seq), 50)]
+    assert calls(find_tandem_repeats(pieces, chunk_size=333)) == whole
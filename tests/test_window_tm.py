@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from common.packed import PackedSeq
+from lab3ex2 import sliding_window_tm, tm, tm2, window_tm_profile
+
+
+def random_seq(n, seed, alphabet='ACGT'):
+    rng = random.Random(seed)
+    return ''.join(rng.choice(alphabet) for _ in range(n))
+
+
+@pytest.mark.parametrize('seq', [random_seq(2000, 1), random_seq(500, 2, 'ACGTACGTN'), 'ACGTACG', ''])
+def test_profiles_match_per_window_formulas(seq):
+    profiles = window_tm_profile(seq, (1, 8, 25))
+    for w, (positions, tm1_values, tm2_values) in profiles.items():
+        windows = [seq[i:i + w] for i in range(len(seq) - w + 1)]
+        assert positions.tolist() == list(range(1, len(windows) + 1))
+        assert tm1_values.tolist() == [tm(s) for s in windows]
+        assert tm2_values.tolist() == pytest.approx([tm2(s) for s in windows])
+
+
+def test_packed_input_gives_the_same_profile():
+    seq = random_seq(3000, 3, 'ACGTACGTN')
+    for (pos, tm1a, tm2a), (_, tm1b, tm2b) in zip(window_tm_profile(seq, (8, 40)).values(),
+                                                  window_tm_profile(PackedSeq(seq), (8, 40)).values()):
+        assert tm1a.tolist() == tm1b.tolist() and tm2a.tolist() == tm2b.tolist()
+
+
+def test_sliding_window_tm_rows():
+    seq = random_seq(100, 4)
+    rows = sliding_window_tm(seq, 8)
+    assert rows == [(i + 1, seq[i:i + 8], tm(seq[i:i + 8]), pytest.approx(tm2(seq[i:i + 8]))) for i in range(93)]
+
+
+def test_window_size_must_be_positive():
+    with pytest.raises(ValueError):
+        window_tm_profile('ACGT', 0)